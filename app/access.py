@@ -6,9 +6,9 @@ from .auth import get_current_user, get_current_user_allow_inactive
 from .database import get_database
 from .db_models import AuditLog, User
 from .audit import log_event_async
+from .user_cache import invalidate_user_cache
 
 REQUEST_TTL_SECONDS = 60 * 60 * 24 * 7
-ACCESS_ACTIONS = ("access_request", "access_approved", "access_denied")
 
 router = APIRouter(prefix="/access", tags=["Access"])
 
@@ -17,11 +17,8 @@ class AccessRequest(BaseModel):
     detail: Optional[str] = None
 
 
-async def _latest_access_log(db, user_id: str):
-    return await db.audit_logs.find_one(
-        {"user_id": user_id, "action": {"$in": list(ACCESS_ACTIONS)}},
-        sort=[("created_at", -1)]
-    )
+async def _access_state(db, user_id: str):
+    return await db.user_access_state.find_one({"_id": user_id})
 
 
 @router.post("/request")
@@ -36,6 +33,7 @@ async def request_access(
     detail = payload.detail or f"Requested access ({user['role']})"
     if user["role"] != "admin":
         await db.users.update_one({"_id": user["_id"]}, {"$set": {"active": False}})
+        invalidate_user_cache(user["email"])
     await log_event_async(db, str(user["_id"]), "access_request", detail)
     return {
         "status": "pending",
@@ -53,7 +51,7 @@ async def access_status(
         raise HTTPException(status_code=404, detail="User not found")
     if user["role"] == "admin":
         return {"status": "approved"}
-    latest = await _latest_access_log(db, str(user["_id"]))
+    latest = await _access_state(db, str(user["_id"]))
     if not latest:
         return {"status": "approved" if user.get("active", True) else "pending"}
     if latest["action"] == "access_approved":
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional, Literal
+import asyncio
 import secrets
 import string
 import os
@@ -8,21 +9,28 @@ import subprocess
 import tempfile
 import zipfile
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, EmailStr
 from bson import ObjectId
-from .auth import get_current_user, hash_password
+import orjson
+from pymongo import ReturnDocument
+from .auth import get_current_user, hash_password_async, require_admin, require_staff
 from .database import get_database
 from .db_models import AppSetting, AuditLog, ExamResult, Question, User
-from .audit import log_event_async
+from .audit import audit_buffer, backfill_access_state, log_event_async, log_events_async
 from .licensure import DEFAULT_TARGET_LICENSURE_OPTIONS
+from .settings_cache import get_cached_settings, invalidate_settings_cache, set_cached_settings
+from .result_cache import invalidate_result_cache
+from .user_cache import invalidate_user_cache
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-ACCESS_ACTIONS = ("access_request", "access_approved", "access_denied")
 REQUEST_TTL_SECONDS = 60 * 60
 TEMP_PASSWORD_TTL_MINUTES = 1440
+TEMP_PASSWORD_ALPHABET = (string.ascii_letters + string.digits).encode("ascii")
+USER_STREAM_BATCH_SIZE = 500
+AUDIT_LOG_PAGE_SIZE = 100
 BACKUP_TIMESTAMP_FMT = "%Y%m%d-%H%M%S"
 
 BACKEND_ROOT = Path(__file__).resolve().parents[1]
@@ -125,6 +133,10 @@ class ResetSelectedExamsRequest(BaseModel):
     user_ids: list[str] = Field(default_factory=list, min_items=1)
 
 
+class BulkAccessRequest(BaseModel):
+    user_ids: list[str] = Field(default_factory=list, min_items=1)
+
+
 class CertificationApprovalRequest(BaseModel):
     override: bool = False
 
@@ -134,11 +146,28 @@ class ProfileEditPermissionRequest(BaseModel):
 
 
 def _generate_temp_password(length: int = 12) -> str:
-    alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    chars = []
+    while len(chars) < length:
+        # Reject bytes >= 248 (4 * 62) so every character is equally likely.
+        chars.extend(
+            TEMP_PASSWORD_ALPHABET[b % 62]
+            for b in secrets.token_bytes(length * 2)
+            if b < 248
+        )
+    return bytes(chars[:length]).decode("ascii")
+
+
+async def _question_bank_has_at_least(db, count: int) -> bool:
+    if count <= 0:
+        return True
+    probe = await db.questions.find({}, {"_id": 1}).skip(count - 1).limit(1).to_list(length=1)
+    return bool(probe)
 
 
 async def get_or_create_settings(db):
+    cached = get_cached_settings()
+    if cached is not None:
+        return cached
     settings = await db.app_settings.find_one({})
     if settings:
         needs_update = False
@@ -173,6 +202,7 @@ async def get_or_create_settings(db):
                     "rl_enabled": settings["rl_enabled"],
                 }},
             )
+        set_cached_settings(settings)
         return settings
     settings_data = {
         "exam_time_limit_minutes": 90,
@@ -185,6 +215,7 @@ async def get_or_create_settings(db):
     }
     result = await db.app_settings.insert_one(settings_data)
     settings_data["_id"] = result.inserted_id
+    set_cached_settings(settings_data)
     return settings_data
 
 
@@ -319,9 +350,7 @@ async def _student_cert_snapshot(db, user: dict, settings: dict) -> dict:
 
 
 @router.get("/settings")
-async def get_settings(current_user=Depends(get_current_user), db = Depends(get_database)):
-    if current_user["role"] not in {"admin", "instructor"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
+async def get_settings(current_user=Depends(require_staff), db = Depends(get_database)):
     settings = await get_or_create_settings(db)
     return {
         "exam_time_limit_minutes": settings["exam_time_limit_minutes"],
@@ -358,12 +387,15 @@ async def get_settings_public(
 @router.put("/settings")
 async def update_settings(
     payload: SettingsUpdate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"admin", "instructor"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    total_questions = await db.questions.count_documents({})
+    required = max(payload.exam_question_count, payload.exam_major_question_count)
+    if await _question_bank_has_at_least(db, required):
+        total_questions = required
+    else:
+        # Exact count: a stale metadata estimate could let invalid settings through.
+        total_questions = await db.questions.count_documents({})
     if payload.exam_question_count > total_questions:
         raise HTTPException(
             status_code=400,
@@ -382,7 +414,7 @@ async def update_settings(
         )
     target_licensure_options = _normalize_licensure_options(payload.target_licensure_options)
     settings = await get_or_create_settings(db)
-    await db.app_settings.update_one(
+    updated_settings = await db.app_settings.find_one_and_update(
         {"_id": settings["_id"]},
         {"$set": {
             "exam_time_limit_minutes": payload.exam_time_limit_minutes,
@@ -392,8 +424,13 @@ async def update_settings(
             "mastery_threshold": payload.mastery_threshold,
             "target_licensure_options": target_licensure_options,
             "rl_enabled": payload.rl_enabled,
-        }}
+        }},
+        return_document=ReturnDocument.AFTER,
     )
+    if updated_settings:
+        set_cached_settings(updated_settings)
+    else:
+        invalidate_settings_cache()
     await log_event_async(
         db,
         None,
@@ -406,7 +443,8 @@ async def update_settings(
             f"rl_enabled: {payload.rl_enabled}"
         ),
     )
-    updated_settings = await db.app_settings.find_one({"_id": settings["_id"]})
+    if not updated_settings:
+        raise HTTPException(status_code=404, detail="Settings not found")
     return {
         "exam_time_limit_minutes": updated_settings["exam_time_limit_minutes"],
         "exam_question_count": updated_settings["exam_question_count"],
@@ -421,31 +459,48 @@ async def update_settings(
 
 
 @router.get("/users")
-async def list_users(current_user=Depends(get_current_user), db = Depends(get_database)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    users = await db.users.find().sort("created_at", -1).to_list(length=None)
-    return [
-        {
-            "id": str(user["_id"]),
-            "email": user["email"],
-            "role": user["role"],
-            "active": user.get("active", True),
-            "profile_edit_allowed": bool(user.get("profile_edit_allowed", False)),
-            "created_at": user["created_at"].isoformat(),
-        }
-        for user in users
-    ]
+async def list_users(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0),
+    current_user=Depends(require_admin),
+    db = Depends(get_database),
+):
+    cursor = db.users.find(
+        {},
+        {"email": 1, "role": 1, "active": 1, "profile_edit_allowed": 1, "created_at": 1},
+    ).sort("created_at", -1).batch_size(USER_STREAM_BATCH_SIZE)
+    if skip:
+        cursor = cursor.skip(skip)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    async def rows():
+        yield b"["
+        first = True
+        async for user in cursor:
+            chunk = orjson.dumps(
+                {
+                    "id": str(user["_id"]),
+                    "email": user["email"],
+                    "role": user["role"],
+                    "active": user.get("active", True),
+                    "profile_edit_allowed": bool(user.get("profile_edit_allowed", False)),
+                    "created_at": user["created_at"],
+                }
+            )
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    return StreamingResponse(rows(), media_type="application/json")
 
 
 @router.post("/users")
 async def create_user(
     payload: CreateUserRequest,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
     existing = await db.users.find_one({"email": payload.email})
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
@@ -465,7 +520,7 @@ async def create_user(
 
     user_data = {
         "email": payload.email,
-        "password_hash": hash_password(password_to_set),
+        "password_hash": await hash_password_async(password_to_set),
         "role": payload.role,
         "active": True,
         "profile_edit_allowed": False,
@@ -493,16 +548,17 @@ async def create_user(
 async def update_user_status(
     user_id: str,
     active: bool,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"active": active}},
+        projection={"email": 1},
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"active": active}})
+    invalidate_user_cache(user["email"])
     await log_event_async(
         db,
         user_id,
@@ -516,11 +572,9 @@ async def update_user_status(
 async def set_profile_edit_permission(
     user_id: str,
     payload: ProfileEditPermissionRequest,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
     user = await db.users.find_one({"_id": ObjectId(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -542,20 +596,24 @@ async def set_profile_edit_permission(
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"email": 1, "active": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user.get("active", True):
         raise HTTPException(status_code=400, detail="Deactivate user before deleting")
-    await db.exam_results.delete_many({"user_id": user_id})
-    await db.audit_logs.delete_many({"user_id": user_id})
-    await db.users.delete_one({"_id": ObjectId(user_id)})
+    # Write out queued entries first so none land after the cascade below.
+    await audit_buffer.flush()
+    await asyncio.gather(
+        db.exam_results.delete_many({"user_id": user_id}),
+        db.audit_logs.delete_many({"user_id": user_id}),
+        db.users.delete_one({"_id": user["_id"]}),
+        db.user_access_state.delete_one({"_id": user_id}),
+    )
+    invalidate_user_cache(user["email"])
+    invalidate_result_cache(user_id)
     await log_event_async(db, None, "user_delete", f"Deleted user {user['email']}")
     return {"deleted": user_id}
 
@@ -563,32 +621,29 @@ async def delete_user(
 @router.delete("/users/{user_id}/exams")
 async def reset_user_exams(
     user_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     result = await db.exam_results.delete_many({"user_id": user_id})
+    invalidate_result_cache(user_id)
     await log_event_async(db, user_id, "exam_reset", f"Deleted {result.deleted_count} exam results")
     return {"deleted": result.deleted_count}
 
 
 @router.delete("/exams/students")
 async def reset_student_exams(
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    students = await db.users.find({"role": "student"}).to_list(length=None)
-    student_ids = [str(user["_id"]) for user in students]
+    cursor = db.users.find({"role": "student"}, projection={"_id": 1})
+    student_ids = [str(user["_id"]) async for user in cursor]
     if not student_ids:
         return {"deleted": 0}
     result = await db.exam_results.delete_many({"user_id": {"$in": student_ids}})
+    invalidate_result_cache()
     await log_event_async(db, None, "exam_reset_bulk", f"Deleted {result.deleted_count} student exam results")
     return {"deleted": result.deleted_count}
 
@@ -596,21 +651,18 @@ async def reset_student_exams(
 @router.post("/exams/students/selected")
 async def reset_selected_student_exams(
     payload: ResetSelectedExamsRequest,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    try:
-        object_ids = [ObjectId(uid) for uid in payload.user_ids]
-    except Exception:
+    object_ids = [ObjectId(uid) for uid in payload.user_ids if ObjectId.is_valid(uid)]
+    if not object_ids:
         raise HTTPException(status_code=400, detail="Invalid user id list")
     users = await db.users.find({"_id": {"$in": object_ids}, "role": "student"}).to_list(length=None)
     student_ids = [str(user["_id"]) for user in users]
     if not student_ids:
         return {"deleted": 0}
     result = await db.exam_results.delete_many({"user_id": {"$in": student_ids}})
+    invalidate_result_cache()
     await log_event_async(
         db,
         None,
@@ -622,12 +674,9 @@ async def reset_selected_student_exams(
 @router.post("/users/{user_id}/password-reset")
 async def reset_user_password(
     user_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
     user = await db.users.find_one({"_id": ObjectId(user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -637,11 +686,12 @@ async def reset_user_password(
     await db.users.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": {
-            "password_hash": hash_password(temp_password),
+            "password_hash": await hash_password_async(temp_password),
             "must_change_password": True,
             "temp_password_expires_at": expires_at
         }}
     )
+    invalidate_user_cache(user["email"])
     await log_event_async(
         db,
         user_id,
@@ -655,109 +705,133 @@ async def reset_user_password(
 
 
 @router.get("/audit-logs")
-async def list_audit_logs(current_user=Depends(get_current_user), db = Depends(get_database)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    logs = await db.audit_logs.find().sort("created_at", -1).limit(100).to_list(length=100)
-    return [
-        {
-            "id": str(log["_id"]),
-            "user_id": log.get("user_id"),
-            "action": log["action"],
-            "detail": log["detail"],
-            "created_at": log["created_at"].isoformat(),
-        }
-        for log in logs
-    ]
+async def list_audit_logs(
+    before_id: Optional[str] = Query(default=None),
+    current_user=Depends(require_admin),
+    db = Depends(get_database),
+):
+    query = {}
+    if before_id:
+        if not ObjectId.is_valid(before_id):
+            raise HTTPException(status_code=400, detail="Invalid before_id")
+        anchor = await db.audit_logs.find_one({"_id": ObjectId(before_id)}, {"created_at": 1})
+        if not anchor:
+            raise HTTPException(status_code=404, detail="Audit log not found")
+        query = {"$or": [
+            {"created_at": {"$lt": anchor["created_at"]}},
+            {"created_at": anchor["created_at"], "_id": {"$lt": anchor["_id"]}},
+        ]}
+    logs = await db.audit_logs.find(
+        query,
+        {"user_id": 1, "action": 1, "detail": 1, "created_at": 1},
+    ).sort([("created_at", -1), ("_id", -1)]).limit(AUDIT_LOG_PAGE_SIZE).to_list(length=AUDIT_LOG_PAGE_SIZE)
+    headers = {}
+    if len(logs) == AUDIT_LOG_PAGE_SIZE:
+        headers["X-Next-Before"] = str(logs[-1]["_id"])
+    return ORJSONResponse(
+        [
+            {
+                "id": str(log["_id"]),
+                "user_id": log.get("user_id"),
+                "action": log["action"],
+                "detail": log["detail"],
+                "created_at": log["created_at"],
+            }
+            for log in logs
+        ],
+        headers=headers,
+    )
 
 
 @router.get("/access-requests")
-async def list_access_requests(current_user=Depends(get_current_user), db = Depends(get_database)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
+async def list_access_requests(current_user=Depends(require_admin), db = Depends(get_database)):
     cutoff = datetime.utcnow() - timedelta(seconds=REQUEST_TTL_SECONDS)
-    logs = await db.audit_logs.find({
-        "action": {"$in": list(ACCESS_ACTIONS)},
-        "created_at": {"$gte": cutoff}
-    }).sort("created_at", -1).to_list(length=None)
-    latest_by_user = {}
-    for log in logs:
-        uid = log.get("user_id")
-        if uid and uid not in latest_by_user:
-            latest_by_user[uid] = log
-    requests = []
-    for user_id, log in latest_by_user.items():
-        if log["action"] != "access_request":
-            continue
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            continue
-        requests.append(
-            {
-                "id": str(user["_id"]),
-                "email": user["email"],
-                "role": user["role"],
-                "requested_at": log["created_at"].isoformat(),
-            }
-        )
-    return requests
+    # Same source as /access-statuses: the latest access action per user.
+    pipeline = [
+        {"$match": {"action": "access_request", "created_at": {"$gte": cutoff}}},
+        {"$sort": {"created_at": -1}},
+        {"$addFields": {
+            "user_oid": {"$convert": {"input": "$_id", "to": "objectId", "onError": None, "onNull": None}},
+        }},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_oid",
+            "foreignField": "_id",
+            "as": "user",
+        }},
+        {"$unwind": "$user"},
+        {"$project": {
+            "_id": 0,
+            "id": "$_id",
+            "email": "$user.email",
+            "role": "$user.role",
+            "requested_at": "$created_at",
+        }},
+    ]
+    cursor = await db.user_access_state.aggregate(pipeline)
+    return ORJSONResponse(await cursor.to_list(length=None))
 
 
 @router.get("/access-statuses")
-async def list_access_statuses(current_user=Depends(get_current_user), db = Depends(get_database)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    users = await db.users.find().to_list(length=None)
-    logs = await db.audit_logs.find({"action": {"$in": list(ACCESS_ACTIONS)}}).sort("created_at", -1).to_list(length=None)
-    latest_by_user = {}
-    for log in logs:
-        uid = log.get("user_id")
-        if uid and uid not in latest_by_user:
-            latest_by_user[uid] = log
+async def list_access_statuses(current_user=Depends(require_admin), db = Depends(get_database)):
     cutoff = datetime.utcnow() - timedelta(seconds=REQUEST_TTL_SECONDS)
-    statuses = []
-    for user in users:
-        uid = str(user["_id"])
-        if user["role"] == "admin":
-            statuses.append({"id": uid, "status": "approved"})
-            continue
-        latest = latest_by_user.get(uid)
-        if not latest:
-            statuses.append({"id": uid, "status": "pending"})
-            continue
-        if latest["action"] == "access_approved":
-            statuses.append({"id": uid, "status": "approved"})
-            continue
-        if latest["action"] == "access_denied":
-            statuses.append({"id": uid, "status": "denied"})
-            continue
-        if latest["action"] == "access_request":
-            if latest["created_at"] < cutoff:
-                statuses.append(
-                    {"id": uid, "status": "expired", "detail": latest.get("detail")}
-                )
-            else:
-                statuses.append(
-                    {"id": uid, "status": "pending", "detail": latest.get("detail")}
-                )
-            continue
-        statuses.append({"id": uid, "status": "pending"})
-    return statuses
+    is_request = {
+        "$and": [
+            {"$ne": ["$role", "admin"]},
+            {"$eq": ["$latest.action", "access_request"]},
+        ]
+    }
+    pipeline = [
+        {"$project": {"role": 1, "uid": {"$toString": "$_id"}}},
+        {
+            "$lookup": {
+                "from": "user_access_state",
+                "localField": "uid",
+                "foreignField": "_id",
+                "as": "latest",
+            }
+        },
+        {"$unwind": {"path": "$latest", "preserveNullAndEmptyArrays": True}},
+        {
+            "$project": {
+                "_id": 0,
+                "id": {"$toString": "$_id"},
+                "status": {
+                    "$switch": {
+                        "branches": [
+                            {"case": {"$eq": ["$role", "admin"]}, "then": "approved"},
+                            {"case": {"$eq": ["$latest.action", "access_approved"]}, "then": "approved"},
+                            {"case": {"$eq": ["$latest.action", "access_denied"]}, "then": "denied"},
+                            {
+                                "case": {"$and": [is_request, {"$lt": ["$latest.created_at", cutoff]}]},
+                                "then": "expired",
+                            },
+                        ],
+                        "default": "pending",
+                    }
+                },
+                "detail": {"$cond": [is_request, {"$ifNull": ["$latest.detail", None]}, "$$REMOVE"]},
+            }
+        },
+    ]
+    cursor = await db.users.aggregate(pipeline)
+    return ORJSONResponse(await cursor.to_list(length=None))
 
 
 @router.post("/access-requests/{user_id}/approve")
 async def approve_access_request(
     user_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"active": True}},
+        projection={"email": 1},
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"active": True}})
+    invalidate_user_cache(user["email"])
     await log_event_async(db, user_id, "access_approved", "Access approved")
     return {"id": user_id, "status": "approved"}
 
@@ -765,28 +839,63 @@ async def approve_access_request(
 @router.post("/access-requests/{user_id}/deny")
 async def deny_access_request(
     user_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db = Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    from bson import ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"active": False}},
+        projection={"email": 1},
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"active": False}})
+    invalidate_user_cache(user["email"])
     await log_event_async(db, user_id, "access_denied", "Access denied")
     return {"id": user_id, "status": "denied"}
 
 
+async def _set_access_bulk(db, user_ids: list[str], active: bool, action: str, detail: str) -> list[str]:
+    object_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+    if not object_ids:
+        raise HTTPException(status_code=400, detail="No valid user ids provided")
+    cursor = db.users.find({"_id": {"$in": object_ids}}, projection={"email": 1})
+    users = await cursor.to_list(length=None)
+    if not users:
+        return []
+    found = [user["_id"] for user in users]
+    await db.users.update_many({"_id": {"$in": found}}, {"$set": {"active": active}})
+    for user in users:
+        invalidate_user_cache(user["email"])
+    ids = [str(object_id) for object_id in found]
+    await log_events_async(db, ids, action, detail)
+    return ids
+
+
+@router.post("/access-requests/approve-bulk")
+async def approve_access_requests_bulk(
+    payload: BulkAccessRequest,
+    current_user=Depends(require_admin),
+    db = Depends(get_database),
+):
+    ids = await _set_access_bulk(db, payload.user_ids, True, "access_approved", "Access approved")
+    return {"ids": ids, "status": "approved"}
+
+
+@router.post("/access-requests/deny-bulk")
+async def deny_access_requests_bulk(
+    payload: BulkAccessRequest,
+    current_user=Depends(require_admin),
+    db = Depends(get_database),
+):
+    ids = await _set_access_bulk(db, payload.user_ids, False, "access_denied", "Access denied")
+    return {"ids": ids, "status": "denied"}
+
+
 @router.get("/certifications")
 async def list_certification_management_data(
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db=Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     settings = await get_or_create_settings(db)
     users = await db.users.find({"role": "student"}).to_list(length=None)
     snapshots = []
@@ -836,12 +945,9 @@ async def list_certification_management_data(
 async def approve_certification_eligibility(
     user_id: str,
     payload: CertificationApprovalRequest,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db=Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     user = await db.users.find_one({"_id": _safe_object_id(user_id), "role": "student"})
     if not user:
         raise HTTPException(status_code=404, detail="Student not found")
@@ -923,12 +1029,9 @@ async def approve_certification_eligibility(
 @router.post("/certifications/{certificate_id}/revoke")
 async def revoke_certificate(
     certificate_id: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db=Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     cert = await db.certificates.find_one({"_id": _safe_object_id(certificate_id)})
     if not cert:
         raise HTTPException(status_code=404, detail="Certificate not found")
@@ -958,12 +1061,9 @@ async def revoke_certificate(
 @router.get("/certifications/verify/{verification_code}")
 async def verify_certificate_code(
     verification_code: str,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
     db=Depends(get_database),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     cert = await db.certificates.find_one({"verification_code": verification_code})
     if not cert:
         raise HTTPException(status_code=404, detail="Verification code not found")
@@ -978,10 +1078,7 @@ async def verify_certificate_code(
 
 
 @router.get("/backup/database")
-async def backup_database(current_user=Depends(get_current_user)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
+async def backup_database(current_user=Depends(require_admin)):
     BACKUP_ROOT.mkdir(parents=True, exist_ok=True)
     timestamp = _safe_timestamp()
     db_name = _database_name()
@@ -1022,10 +1119,7 @@ async def backup_database(current_user=Depends(get_current_user)):
 
 
 @router.get("/backup/system")
-async def backup_system(current_user=Depends(get_current_user)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
+async def backup_system(current_user=Depends(require_admin)):
     BACKUP_ROOT.mkdir(parents=True, exist_ok=True)
     timestamp = _safe_timestamp()
     backup_zip = BACKUP_ROOT / f"system-backup-{timestamp}.zip"
@@ -1040,10 +1134,8 @@ async def backup_system(current_user=Depends(get_current_user)):
 @router.post("/restore/database")
 async def restore_database(
     file: UploadFile = File(...),
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
     if not file.filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="Upload a .zip database backup")
 
@@ -1088,6 +1180,14 @@ async def restore_database(
                 status_code=500,
                 detail=f"Database restore failed: {result.stderr.strip() or result.stdout.strip()}",
             )
+    invalidate_settings_cache()
+    invalidate_user_cache()
+    invalidate_result_cache()
+    # Older dumps carry no user_access_state, so --drop leaves the current
+    # rows in place; rebuild them from the restored audit entries.
+    restored_db = get_database()
+    await restored_db.user_access_state.delete_many({})
+    await backfill_access_state(restored_db)
 
     return {"restored": True, "database": db_name}
 
@@ -1095,10 +1195,8 @@ async def restore_database(
 @router.post("/restore/system")
 async def restore_system(
     file: UploadFile = File(...),
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_admin),
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
     if not file.filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="Upload a .zip system backup")
 
@@ -1,4 +1,95 @@
-from datetime import datetime
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_SECONDS = 0.05
+AUDIT_HIGH_WATER = 10000
+# Opt-in: audit history is kept forever unless a positive day count is set.
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "0"))
+AUDIT_RETENTION_INTERVAL_SECONDS = 60 * 60 * 6
+
+# These entries also update user_access_state, which every access view reads,
+# so they are written straight through to keep those views read-your-writes.
+SYNC_ACTIONS = frozenset({"access_request", "access_approved", "access_denied"})
+ACCESS_STATE_MIGRATION_ID = "user_access_state_backfill"
+
+
+class AuditLogBuffer:
+    def __init__(
+        self,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_seconds: float = AUDIT_FLUSH_SECONDS,
+        high_water: int = AUDIT_HIGH_WATER,
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.high_water = high_water
+        self._collection = None
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, db):
+        if self.running:
+            return
+        # Acknowledged writes, so a failed batch reaches the log in _write.
+        self._collection = db.audit_logs
+        # A bounded queue makes producers wait once the writer falls behind.
+        self._queue = asyncio.Queue(maxsize=self.high_water)
+        self._task = asyncio.create_task(self._consume())
+
+    async def put(self, entry: dict):
+        await self._queue.put(entry)
+
+    async def flush(self):
+        # Waits until every entry queued so far has been written.
+        if self.running:
+            await self._queue.join()
+
+    async def stop(self):
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _consume(self):
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                return
+            batch = [entry]
+            stopping = False
+            try:
+                while len(batch) < self.batch_size:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout=self.flush_seconds)
+                    if entry is None:
+                        self._queue.task_done()
+                        stopping = True
+                        break
+                    batch.append(entry)
+            except asyncio.TimeoutError:
+                pass
+            await self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                return
+
+    async def _write(self, batch: list):
+        try:
+            await self._collection.insert_many(batch, ordered=False)
+        except Exception as exc:
+            print(f"[audit] Failed to write {len(batch)} audit entries: {exc}")
+
+
+audit_buffer = AuditLogBuffer()
 
 
 async def log_event_async(db, user_id, action: str, detail: str):
@@ -8,4 +99,110 @@ async def log_event_async(db, user_id, action: str, detail: str):
         "detail": detail,
         "created_at": datetime.utcnow()
     }
-    await db.audit_logs.insert_one(entry)
+    if action in SYNC_ACTIONS:
+        await asyncio.gather(
+            db.audit_logs.insert_one(entry),
+            record_access_state(db, [user_id], action, detail, entry["created_at"]),
+        )
+        return
+    if not audit_buffer.running:
+        await db.audit_logs.insert_one(entry)
+        return
+    await audit_buffer.put(entry)
+
+
+async def record_access_state(db, user_ids, action: str, detail: str, created_at: datetime):
+    # The only writer of user_access_state outside the startup migration and
+    # restore reconcile; every access endpoint reads state from there. A
+    # concurrent write with a newer created_at is never overwritten.
+    is_newer = {"$not": [{"$gt": ["$created_at", created_at]}]}
+    update = [{"$set": {
+        "action": {"$cond": [is_newer, {"$literal": action}, "$action"]},
+        "detail": {"$cond": [is_newer, {"$literal": detail}, "$detail"]},
+        "created_at": {"$cond": [is_newer, created_at, "$created_at"]},
+    }}]
+    operations = [UpdateOne({"_id": user_id}, update, upsert=True) for user_id in user_ids if user_id]
+    if operations:
+        await db.user_access_state.bulk_write(operations, ordered=False)
+
+
+async def log_events_async(db, user_ids, action: str, detail: str):
+    now = datetime.utcnow()
+    entries = [
+        {"user_id": user_id, "action": action, "detail": detail, "created_at": now}
+        for user_id in user_ids
+    ]
+    if not entries:
+        return
+    if action in SYNC_ACTIONS:
+        await asyncio.gather(
+            db.audit_logs.insert_many(entries, ordered=False),
+            record_access_state(db, user_ids, action, detail, now),
+        )
+        return
+    if not audit_buffer.running:
+        await db.audit_logs.insert_many(entries, ordered=False)
+        return
+    for entry in entries:
+        await audit_buffer.put(entry)
+
+
+async def purge_old_audit_logs(db) -> int:
+    if AUDIT_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=AUDIT_RETENTION_DAYS)
+    # Access state is read from the latest access entry, so those are kept.
+    result = await db.audit_logs.delete_many({
+        "created_at": {"$lt": cutoff},
+        "action": {"$nin": list(SYNC_ACTIONS)},
+    })
+    return result.deleted_count
+
+
+async def run_audit_retention(db):
+    while True:
+        try:
+            deleted = await purge_old_audit_logs(db)
+            if deleted:
+                print(f"[audit] Purged {deleted} audit entries older than {AUDIT_RETENTION_DAYS} days")
+        except Exception as exc:
+            print(f"[audit] Retention purge failed: {exc}")
+        await asyncio.sleep(AUDIT_RETENTION_INTERVAL_SECONDS)
+
+
+async def backfill_access_state(db):
+    # Reconcile user_access_state with the latest access entry per user; a
+    # state row is only replaced when the audit entry is newer than it.
+    pipeline = [
+        {"$match": {"action": {"$in": list(SYNC_ACTIONS)}, "user_id": {"$ne": None}}},
+        {"$sort": {"user_id": 1, "created_at": -1}},
+        {"$group": {
+            "_id": "$user_id",
+            "action": {"$first": "$action"},
+            "detail": {"$first": "$detail"},
+            "created_at": {"$first": "$created_at"},
+        }},
+        {"$merge": {
+            "into": "user_access_state",
+            "whenMatched": [
+                {"$replaceWith": {
+                    "$cond": [{"$gt": ["$$new.created_at", "$created_at"]}, "$$new", "$$ROOT"],
+                }},
+            ],
+            "whenNotMatched": "insert",
+        }},
+    ]
+    cursor = await db.audit_logs.aggregate(pipeline)
+    await cursor.to_list(length=None)
+
+
+async def migrate_access_state(db):
+    # Runs the full backfill once per database rather than on every boot.
+    if await db.migrations.find_one({"_id": ACCESS_STATE_MIGRATION_ID}, {"_id": 1}):
+        return
+    await backfill_access_state(db)
+    await db.migrations.update_one(
+        {"_id": ACCESS_STATE_MIGRATION_ID},
+        {"$set": {"completed_at": datetime.utcnow()}},
+        upsert=True,
+    )
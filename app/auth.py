@@ -1,96 +1,151 @@
+import asyncio
 from datetime import datetime, timedelta
 import os
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
+import jwt
 from passlib.context import CryptContext
 from .models import AdminRegisterRequest, ChangePasswordRequest, RegisterRequest, LoginRequest
 from .config import SECRET_KEY, ALGORITHM
 from .database import get_database
 from .db_models import User
 from .audit import log_event_async
+from .user_cache import get_cached_user, invalidate_user_cache, set_cached_user
 
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 120  # Set token validity to 2 hours
+STAFF_ROLES = frozenset({"instructor", "admin"})
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db = Depends(get_database),
+async def _decoded_payload(request: Request, token: str = Depends(oauth2_scheme)):
+    payload = getattr(request.state, "jwt_payload", None)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        request.state.jwt_payload = payload
+    return payload
+
+
+async def _get_user_state(db, email: str):
+    state = get_cached_user(email)
+    if state is not None:
+        return state
+    user = await db.users.find_one(
+        {"email": email},
+        {"active": 1, "must_change_password": 1},
+    )
+    if not user:
+        return None
+    state = {
+        "id": str(user["_id"]),
+        "active": user.get("active", True),
+        "must_change_password": user.get("must_change_password", False),
+    }
+    set_cached_user(email, state)
+    return state
+
+
+async def _authenticate(
+    payload: dict,
+    db,
+    allow_inactive: bool = False,
+    allow_password_reset: bool = False,
 ):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
-        role = payload.get("role")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email})
-        if not user or not user.get("active", True):
+        user = await _get_user_state(db, email)
+        if not user:
+            if allow_inactive:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            raise HTTPException(status_code=403, detail="User is inactive")
+        if not allow_inactive and not user.get("active", True):
             raise HTTPException(status_code=403, detail="User is inactive")
-        if user.get("must_change_password", False):
+        if not allow_password_reset and not allow_inactive and user.get("must_change_password", False):
             raise HTTPException(status_code=403, detail="Password reset required")
-        return {"email": email, "role": role}
+        return {"id": user["id"], "email": email, "role": payload.get("role")}
     except HTTPException:
         raise
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+async def get_current_user(
+    payload: dict = Depends(_decoded_payload),
+    db = Depends(get_database),
+):
+    return await _authenticate(payload, db)
+
+
 async def get_current_user_allow_inactive(
-    token: str = Depends(oauth2_scheme),
+    payload: dict = Depends(_decoded_payload),
     db = Depends(get_database),
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        role = payload.get("role")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email})
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return {"email": email, "role": role}
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return await _authenticate(payload, db, allow_inactive=True)
 
 
 async def get_current_user_allow_password_reset(
-    token: str = Depends(oauth2_scheme),
+    payload: dict = Depends(_decoded_payload),
     db = Depends(get_database),
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        role = payload.get("role")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email})
-        if not user or not user.get("active", True):
-            raise HTTPException(status_code=403, detail="User is inactive")
-        return {"email": email, "role": role}
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return await _authenticate(payload, db, allow_password_reset=True)
+
+
+async def require_admin(current_user=Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
+
+
+async def require_staff(current_user=Depends(get_current_user)):
+    if current_user["role"] not in STAFF_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__memory_cost=65536,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
+
+
+def warm_up_password_hashing():
+    # Called from startup so the backend loads before the first login rather
+    # than on import.
+    pwd_context.hash("warmup")
 
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password_async(password: str) -> str:
+    # argon2 is CPU- and memory-bound; keep it off the event loop.
+    return await asyncio.to_thread(hash_password, password)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -106,7 +161,7 @@ async def ensure_admin_user(db):
         return
     user_data = {
         "email": admin_email,
-        "password_hash": hash_password(admin_password),
+        "password_hash": await hash_password_async(admin_password),
         "role": "admin",
         "active": True,
         "must_change_password": False,
@@ -124,9 +179,15 @@ async def register(data: RegisterRequest, db = Depends(get_database)):
 @router.post("/login")
 async def login(data: LoginRequest, db = Depends(get_database)):
     user = await db.users.find_one({"email": data.email})
-
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await asyncio.to_thread(
+        verify_and_update_password, data.password, user["password_hash"]
+    )
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
     if not user.get("active", True):
         raise HTTPException(status_code=403, detail="User is inactive")
     if user.get("must_change_password", False) and user.get("temp_password_expires_at"):
@@ -159,7 +220,7 @@ async def register_admin(data: AdminRegisterRequest, db = Depends(get_database))
 
     user_data = {
         "email": data.email,
-        "password_hash": hash_password(data.password),
+        "password_hash": await hash_password_async(data.password),
         "role": "admin",
         "active": True,
         "must_change_password": False,
@@ -183,21 +244,22 @@ async def change_password(
     user = await db.users.find_one({"email": current_user["email"]})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    if not verify_password(payload.current_password, user["password_hash"]):
+    if not await verify_password_async(payload.current_password, user["password_hash"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     if len(payload.new_password) < 8:
         raise HTTPException(status_code=400, detail="New password is too short")
-    if verify_password(payload.new_password, user["password_hash"]):
+    if await verify_password_async(payload.new_password, user["password_hash"]):
         raise HTTPException(status_code=400, detail="New password must be different")
 
     await db.users.update_one(
         {"_id": user["_id"]},
         {"$set": {
-            "password_hash": hash_password(payload.new_password),
+            "password_hash": await hash_password_async(payload.new_password),
             "must_change_password": False,
             "temp_password_expires_at": None
         }}
     )
+    invalidate_user_cache(user["email"])
     await log_event_async(db, str(user["_id"]), "password_change", "Password updated")
 
     access_token = create_access_token({
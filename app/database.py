@@ -1,13 +1,28 @@
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 
+# The single .env load for the process; every app module imports this one
+# before reading its own settings.
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "reviewer_ui")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "30000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+# 0 keeps the driver default of no socket timeout.
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "0"))
 
-client = AsyncIOMotorClient(MONGODB_URL)
+client = AsyncMongoClient(
+    MONGODB_URL,
+    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+    minPoolSize=MONGODB_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS or None,
+)
 database = client[DATABASE_NAME]
 
 
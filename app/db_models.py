@@ -1,27 +1,26 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List, Dict, Any
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 from bson import ObjectId
 
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+def _validate_object_id(value) -> str:
+    if not ObjectId.is_valid(value):
+        raise ValueError("Invalid objectid")
+    return str(value)
 
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid objectid")
-        return ObjectId(v)
 
-    @classmethod
-    def __get_pydantic_json_schema__(cls, core_schema, handler):
-        return {"type": "string"}
+def _new_object_id() -> str:
+    return str(ObjectId())
+
+
+PyObjectId = Annotated[str, BeforeValidator(_validate_object_id)]
 
 
 class User(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     email: str
     password_hash: str
     role: str
@@ -30,14 +29,11 @@ class User(BaseModel):
     temp_password_expires_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
 
 class StudentProfile(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     user_id: str  # ObjectId as string
     student_id_number: str
     first_name: str
@@ -56,14 +52,11 @@ class StudentProfile(BaseModel):
     required_passing_threshold: int
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
 
 class Question(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     exam_type: str
     subject: str
     topic: str
@@ -75,14 +68,11 @@ class Question(BaseModel):
     d: str
     answer: str
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
 
 class ExamResult(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     user_id: str  # ObjectId as string
     exam_type: str
     score: int
@@ -93,14 +83,11 @@ class ExamResult(BaseModel):
     incorrect_questions: List[Dict[str, Any]]
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
 
 class AppSetting(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     exam_time_limit_minutes: int = 90
     exam_question_count: int = 50
     exam_major_question_count: int = 50
@@ -108,20 +95,12 @@ class AppSetting(BaseModel):
     mastery_threshold: int = 90
     target_licensure_options: List[Dict[str, Any]] = Field(default_factory=list)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
 
 class AuditLog(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+    id: PyObjectId = Field(default_factory=_new_object_id, alias="_id")
     user_id: Optional[str] = None  # ObjectId as string
     action: str
     detail: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
-
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
@@ -0,0 +1,152 @@
+from .questions import build_question_key
+
+# Starter question bank, imported only when seeding an empty collection.
+DEFAULT_QUESTIONS = [
+    {
+        "exam_type": "LET",
+        "subject": "GenEd",
+        "topic": "Reading",
+        "difficulty": "Easy",
+        "question": "What is the main idea of a paragraph?",
+        "a": "The supporting details",
+        "b": "The topic sentence",
+        "c": "The conclusion",
+        "d": "The title",
+        "answer": "B",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "GenEd",
+        "topic": "Math",
+        "difficulty": "Medium",
+        "question": "What is the value of 3/4 + 1/8?",
+        "a": "5/8",
+        "b": "7/8",
+        "c": "1",
+        "d": "9/8",
+        "answer": "B",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "GenEd",
+        "topic": "Science",
+        "difficulty": "Hard",
+        "question": "Which layer of the Earth is liquid?",
+        "a": "Inner core",
+        "b": "Mantle",
+        "c": "Outer core",
+        "d": "Crust",
+        "answer": "C",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "Mathematics",
+        "topic": "Algebra",
+        "difficulty": "Medium",
+        "question": "What is x if 2x + 4 = 10?",
+        "a": "2",
+        "b": "3",
+        "c": "4",
+        "d": "5",
+        "answer": "B",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "Science",
+        "topic": "Biology",
+        "difficulty": "Easy",
+        "question": "Which organelle is the powerhouse of the cell?",
+        "a": "Nucleus",
+        "b": "Mitochondria",
+        "c": "Ribosome",
+        "d": "Golgi apparatus",
+        "answer": "B",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "Social Studies",
+        "topic": "History",
+        "difficulty": "Medium",
+        "question": "Who wrote the Philippine novel Noli Me Tangere?",
+        "a": "Jose Rizal",
+        "b": "Andres Bonifacio",
+        "c": "Emilio Aguinaldo",
+        "d": "Apolinario Mabini",
+        "answer": "A",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "English",
+        "topic": "Grammar",
+        "difficulty": "Easy",
+        "question": "Choose the correct verb: She ___ to the store yesterday.",
+        "a": "go",
+        "b": "goes",
+        "c": "went",
+        "d": "gone",
+        "answer": "C",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "Filipino",
+        "topic": "Wika",
+        "difficulty": "Medium",
+        "question": "Alin ang tamang baybay?",
+        "a": "Tagumpay",
+        "b": "Tagumpaey",
+        "c": "Tagumpai",
+        "d": "Tagumpae",
+        "answer": "A",
+    },
+    {
+        "exam_type": "LET",
+        "subject": "P.E",
+        "topic": "Fitness",
+        "difficulty": "Easy",
+        "question": "Ilang minuto ang inirerekomendang moderate exercise kada linggo?",
+        "a": "30",
+        "b": "60",
+        "c": "150",
+        "d": "300",
+        "answer": "C",
+    },
+    {
+        "exam_type": "CPA",
+        "subject": "FAR",
+        "topic": "Assets",
+        "difficulty": "Hard",
+        "question": "Which asset is measured at amortized cost?",
+        "a": "Equity securities",
+        "b": "Trading securities",
+        "c": "Held-to-maturity investments",
+        "d": "Derivatives",
+        "answer": "C",
+    },
+    {
+        "exam_type": "CPA",
+        "subject": "Taxation",
+        "topic": "VAT",
+        "difficulty": "Medium",
+        "question": "What is the standard VAT rate in the Philippines?",
+        "a": "8%",
+        "b": "10%",
+        "c": "12%",
+        "d": "15%",
+        "answer": "C",
+    },
+    {
+        "exam_type": "CPA",
+        "subject": "Auditing",
+        "topic": "Opinion",
+        "difficulty": "Easy",
+        "question": "Which opinion is issued when statements are free of material misstatement?",
+        "a": "Qualified",
+        "b": "Adverse",
+        "c": "Disclaimer",
+        "d": "Unmodified",
+        "answer": "D",
+    },
+]
+
+for question in DEFAULT_QUESTIONS:
+    question["question_key"] = build_question_key(question)
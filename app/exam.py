@@ -1,10 +1,21 @@
-﻿from datetime import datetime
+﻿from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import asyncio
+import heapq
+import os
 import random
+import re
+from uuid import uuid4
 from bson import ObjectId
-from .auth import get_current_user
+from .auth import get_current_user, require_staff
+from .admin import get_or_create_settings
+from .result_cache import get_cached_latest_result, set_cached_latest_result
 from .database import get_database
 from .db_models import AppSetting, ExamResult, Question, StudentProfile, User
 from .audit import log_event_async
@@ -14,6 +25,35 @@ router = APIRouter(prefix="/exam", tags=["Exam"])
 
 GENED_LABEL = "General Education"
 PROFED_LABEL = "Professional Education"
+CORE_SECTION_SUBJECTS = {
+    "profed": PROFED_LABEL,
+    "professional education": PROFED_LABEL,
+    "professional ed": PROFED_LABEL,
+    "gened": GENED_LABEL,
+    "general education": GENED_LABEL,
+}
+# start_exam samples from a slim pool, then loads the rendered fields for the
+# chosen questions only. The answer key is loaded for the exam session and
+# never returned to the client.
+EXAM_POOL_PROJECTION = {"subject": 1, "topic": 1, "difficulty": 1}
+EXAM_QUESTION_PROJECTION = {
+    "question": 1,
+    "a": 1,
+    "b": 1,
+    "c": 1,
+    "d": 1,
+    "difficulty": 1,
+    "subject": 1,
+    "topic": 1,
+}
+# Upper bound on candidate questions held in memory per start_exam call; the
+# pool is a uniform $sample so a larger bank is not truncated to old inserts.
+EXAM_POOL_MAX = int(os.getenv("EXAM_POOL_MAX", "20000"))
+QUESTION_OUT_FIELDS = ("question", "a", "b", "c", "d", "difficulty")
+_question_out_values = itemgetter(*QUESTION_OUT_FIELDS)
+ANSWER_KEY_FIELDS = ("subject", "topic", "difficulty", "question", "answer")
+EXAM_SESSION_GRACE_MINUTES = 30
+EXAM_SESSION_HEADER = "X-Exam-Session"
 
 
 def _clamp(value: float, low: float, high: float) -> float:
@@ -98,64 +138,68 @@ def section_label_for(bucket, major, extra_major=False):
     return bucket or "General"
 
 
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+LABEL_ALIASES = {
+    "socialscience": "socialstudies",
+    "socialstudies": "socialstudies",
+    "socialscie": "socialstudies",
+    "socialsci": "socialstudies",
+    "socsci": "socialstudies",
+    "mathematics": "math",
+    "math": "math",
+    "mathema": "math",
+    "mathem": "math",
+    "english": "english",
+    "filipino": "filipino",
+    "science": "science",
+    "professionaleducation": "professionaleducation",
+    "professionaledu": "professionaleducation",
+    "professional": "professionaleducation",
+    "profed": "professionaleducation",
+    "generaleducation": "gened",
+    "generale": "gened",
+    "general": "gened",
+    "gened": "gened",
+}
+MAJOR_STOPWORDS = frozenset(
+    {"major", "specialization", "specialisation", "track", "let", "secondary", "elementary"}
+)
+
+
+@lru_cache(maxsize=4096)
 def normalize_label(value: str) -> str:
     if not value:
         return ""
-    cleaned = "".join(ch for ch in value.lower() if ch.isalnum())
-    aliases = {
-        "socialscience": "socialstudies",
-        "socialstudies": "socialstudies",
-        "socialscie": "socialstudies",
-        "socialsci": "socialstudies",
-        "socsci": "socialstudies",
-        "mathematics": "math",
-        "math": "math",
-        "mathema": "math",
-        "mathem": "math",
-        "english": "english",
-        "filipino": "filipino",
-        "science": "science",
-        "professionaleducation": "professionaleducation",
-        "professionaledu": "professionaleducation",
-        "professional": "professionaleducation",
-        "profed": "professionaleducation",
-        "generaleducation": "gened",
-        "generale": "gened",
-        "general": "gened",
-        "gened": "gened",
-    }
-    return aliases.get(cleaned, cleaned)
+    cleaned = _NON_ALNUM_RE.sub("", value.lower())
+    return LABEL_ALIASES.get(cleaned, cleaned)
 
 
+@lru_cache(maxsize=4096)
 def normalize_major_candidate(value: str) -> str:
     if not value:
         return ""
-    cleaned = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in value.lower())
-    tokens = [
-        token
-        for token in cleaned.split()
-        if token not in {"major", "specialization", "specialisation", "track", "let", "secondary", "elementary"}
-    ]
-    compact = "".join(tokens)
+    tokens = _NON_ALNUM_RE.sub(" ", value.lower()).split()
+    compact = "".join(token for token in tokens if token not in MAJOR_STOPWORDS)
     return normalize_label(compact)
 
 
+@lru_cache(maxsize=4096)
+def label_keys(value: str):
+    # (normalized label, major key)
+    return normalize_label(value), normalize_major_candidate(value)
+
+
+def _label_in(label: str, labels) -> bool:
+    # Equal, or one side is the other plus a single plural "s".
+    return label in labels or label + "s" in labels or (label.endswith("s") and label[:-1] in labels)
+
+
 def labels_equivalent(a: str, b: str) -> bool:
     if not a or not b:
         return False
-    a_norm = normalize_label(a)
-    b_norm = normalize_label(b)
-    if a_norm == b_norm:
-        return True
-    if a_norm.endswith("s") and a_norm[:-1] == b_norm:
-        return True
-    if b_norm.endswith("s") and b_norm[:-1] == a_norm:
-        return True
-    a_major = normalize_major_candidate(a)
-    b_major = normalize_major_candidate(b)
-    if a_major and b_major and a_major == b_major:
-        return True
-    return False
+    a_label, a_major = label_keys(a)
+    b_label, b_major = label_keys(b)
+    return _label_in(a_label, (b_label,)) or bool(a_major and a_major == b_major)
 
 
 def build_subject_filter(profile, subjects):
@@ -196,23 +240,33 @@ def build_subject_filter(profile, subjects):
 
 
 def subject_bucket_for(question, profile):
-    subject = (question.get("subject") or "").strip()
-    topic = (question.get("topic") or "").strip().lower()
-    subject_lower = subject.lower()
+    return _subject_bucket(
+        question.get("subject") or "",
+        question.get("topic") or "",
+        profile.get("target_licensure") == "LET",
+        (profile.get("major_specialization") or "").strip(),
+    )
 
-    if profile.get("target_licensure") != "LET":
+
+@lru_cache(maxsize=4096)
+def _subject_bucket(raw_subject: str, raw_topic: str, is_let: bool, major: str):
+    subject = raw_subject.strip()
+    if not is_let:
         return subject or "General"
 
+    topic = raw_topic.strip().lower()
+    subject_lower = subject.lower()
+    section = CORE_SECTION_SUBJECTS.get(subject_lower)
+
     if (
-        subject_lower in {"profed", "professional education", "professional ed"}
+        section == PROFED_LABEL
         or subject_lower.startswith("prof")
         or topic.startswith("professional education")
     ):
         return PROFED_LABEL
-    if subject_lower in {"gened", "general education"} or subject_lower.startswith("gen") or subject_lower.startswith("general"):
+    if section == GENED_LABEL or subject_lower.startswith("gen"):
         return GENED_LABEL
 
-    major = (profile.get("major_specialization") or "").strip()
     if major:
         if labels_equivalent(subject, major) or labels_equivalent(topic, major):
             return major
@@ -237,10 +291,24 @@ PASS_DIFFICULTY_MIX = {"Easy": 0.20, "Medium": 0.40, "Hard": 0.40}
 FAIL_DIFFICULTY_MIX = {"Easy": 0.60, "Medium": 0.30, "Hard": 0.10}
 
 
+async def _latest_result_for(db, user_id: str, exam_type: str) -> str:
+    cached = get_cached_latest_result(user_id, exam_type)
+    if cached is not None:
+        return cached
+    latest = await db.exam_results.find_one(
+        {"user_id": user_id, "exam_type": exam_type},
+        {"result": 1},
+        sort=[("created_at", -1)],
+    )
+    result = (latest.get("result") or "") if latest else ""
+    set_cached_latest_result(user_id, exam_type, result)
+    return result
+
+
 def difficulty_mix_for_result(latest_result):
     if not latest_result:
         return DEFAULT_DIFFICULTY_MIX
-    result = (latest_result.get("result") or "").upper()
+    result = latest_result.upper()
     if result == "PASS":
         return PASS_DIFFICULTY_MIX
     if result == "FAIL":
@@ -254,16 +322,10 @@ def allocate_by_weight(total, weights):
     raw = {level: total * float(weights.get(level, 0)) for level in DIFFICULTY_LEVELS}
     counts = {level: int(raw[level]) for level in DIFFICULTY_LEVELS}
     remainder = total - sum(counts.values())
-    fractional = sorted(
-        [(level, raw[level] - counts[level]) for level in DIFFICULTY_LEVELS],
-        key=lambda item: item[1],
-        reverse=True,
-    )
-    for level, _ in fractional:
-        if remainder <= 0:
-            break
-        counts[level] += 1
-        remainder -= 1
+    if remainder > 0:
+        fractions = {level: raw[level] - counts[level] for level in DIFFICULTY_LEVELS}
+        for level in heapq.nlargest(remainder, DIFFICULTY_LEVELS, key=fractions.__getitem__):
+            counts[level] += 1
     return counts
 
 
@@ -287,22 +349,21 @@ def select_questions_with_mix(pool, total, weights):
 
     desired = allocate_by_weight(total, weights)
     selected = []
-    selected_ids = set()
 
+    # Difficulty groups are disjoint, so each one is sampled independently.
     for level in DIFFICULTY_LEVELS:
         need = desired.get(level, 0)
-        options = [q for q in groups.get(level, []) if q["_id"] not in selected_ids]
         if need <= 0:
             continue
+        options = groups[level]
         if len(options) <= need:
-            chosen = options
+            selected.extend(options)
         else:
-            chosen = random.sample(options, need)
-        selected.extend(chosen)
-        selected_ids.update({q["_id"] for q in chosen})
+            selected.extend(random.sample(options, need))
 
     remaining = total - len(selected)
     if remaining > 0:
+        selected_ids = {q["_id"] for q in selected}
         remaining_pool = [q for q in pool if q["_id"] not in selected_ids]
         if len(remaining_pool) < remaining:
             raise HTTPException(
@@ -316,18 +377,30 @@ def select_questions_with_mix(pool, total, weights):
 
     return selected
 
-@router.post("/start")
+
+async def _sample_question_pool(db, query: dict) -> list:
+    cursor = await db.questions.aggregate(
+        [
+            {"$match": query},
+            {"$project": EXAM_POOL_PROJECTION},
+            {"$sample": {"size": EXAM_POOL_MAX}},
+        ],
+        allowDiskUse=True,
+    )
+    return await cursor.to_list(length=EXAM_POOL_MAX)
+
+
+@router.post("/start", response_class=ORJSONResponse)
 async def start_exam(
     current_user=Depends(get_current_user),
     db = Depends(get_database),
 ):
-    email = current_user["email"]
+    user_id = current_user["id"]
 
-    user = await db.users.find_one({"email": email})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    profile = await db.student_profiles.find_one({"user_id": str(user["_id"])})
+    profile, settings = await asyncio.gather(
+        db.student_profiles.find_one({"user_id": user_id}),
+        get_or_create_settings(db),
+    )
     if not profile:
         raise HTTPException(status_code=400, detail="Profile not found")
 
@@ -338,16 +411,24 @@ async def start_exam(
 
     query = {"exam_type": exam_type}
     subject_filter = build_subject_filter(profile, subjects)
-    question_list = await db.questions.find(query).to_list(length=None)
+    question_list, latest_result = await asyncio.gather(
+        _sample_question_pool(db, query),
+        _latest_result_for(db, user_id, exam_type),
+    )
     if exam_type != "LET" and subject_filter:
+        allowed_keys = [label_keys(allowed) for allowed in subject_filter if allowed]
+        allowed_labels = {label for label, _ in allowed_keys}
+        allowed_majors = {major_key for _, major_key in allowed_keys if major_key}
         filtered = []
         for question in question_list:
             question_subject = (question.get("subject") or "").strip()
-            if any(labels_equivalent(question_subject, allowed) for allowed in subject_filter):
+            if not question_subject:
+                continue
+            label, major_key = label_keys(question_subject)
+            if _label_in(label, allowed_labels) or major_key in allowed_majors:
                 filtered.append(question)
         question_list = filtered or question_list
 
-    settings = await db.app_settings.find_one({})
     base_total = settings["exam_question_count"] if settings else 50
     if not base_total or base_total < 1:
         base_total = 50
@@ -365,14 +446,7 @@ async def start_exam(
         extra_major_count = major_setting
     total_questions = base_total + extra_major_count
 
-
-    latest_result = (
-        await db.exam_results.find({"user_id": str(user["_id"]), "exam_type": exam_type})
-        .sort("created_at", -1)
-        .limit(1)
-        .to_list(length=1)
-    )
-    difficulty_mix = difficulty_mix_for_result(latest_result[0] if latest_result else None)
+    difficulty_mix = difficulty_mix_for_result(latest_result)
 
     extra_major_ids = set()
     if exam_type == "LET":
@@ -418,8 +492,9 @@ async def start_exam(
             selected = []
             selected_ids = set()
             extra_major_ids = set()
+            # Buckets are disjoint, so each label samples from its own list.
             for label in counts:
-                pool = [q for q in buckets.get(label, []) if q["_id"] not in selected_ids]
+                pool = buckets.get(label, [])
                 take = min(counts[label], len(pool))
                 if take <= 0:
                     continue
@@ -447,7 +522,10 @@ async def start_exam(
 
             # Add extra major questions if applicable
             if major and extra_major_count:
-                major_pool = [q for q in buckets.get(major, []) if q["_id"] not in selected_ids]
+                major_pool = buckets.get(major, [])
+                if major in (GENED_LABEL, PROFED_LABEL):
+                    # The major shares its bucket with a core section.
+                    major_pool = [q for q in major_pool if q["_id"] not in selected_ids]
                 if len(major_pool) < extra_major_count:
                     raise HTTPException(
                         status_code=400,
@@ -465,89 +543,123 @@ async def start_exam(
     else:
         exam_questions = select_questions_with_mix(question_list, total_questions, difficulty_mix)
 
+    cursor = db.questions.find(
+        {"_id": {"$in": [q["_id"] for q in exam_questions]}},
+        projection={**EXAM_QUESTION_PROJECTION, "answer": 1},
+    )
+    questions_by_id = {q["_id"]: q async for q in cursor}
+    answer_key = {}
+
     response = []
     major_label = (profile.get("major_specialization") or "").strip()
-    for q in exam_questions:
+    for picked in exam_questions:
+        q = questions_by_id.get(picked["_id"])
+        if not q:
+            continue
         bucket = subject_bucket_for(q, profile)
         is_extra = bool(extra_major_count and q["_id"] in extra_major_ids and bucket == major_label)
-        response.append(
-            {
-                "id": str(q["_id"]),
-                "question": q["question"],
-                "a": q["a"],
-                "b": q["b"],
-                "c": q["c"],
-                "d": q["d"],
-                "difficulty": q["difficulty"],
-                "section": section_label_for(bucket, major_label, extra_major=is_extra),
-            }
-        )
-    return response
+        row = dict(zip(QUESTION_OUT_FIELDS, _question_out_values(q)))
+        row["id"] = str(q["_id"])
+        row["section"] = section_label_for(bucket, major_label, extra_major=is_extra)
+        response.append(row)
+        answer_key[str(q["_id"])] = {field: q.get(field) for field in ANSWER_KEY_FIELDS}
+
+    now = datetime.utcnow()
+    time_limit = (settings or {}).get("exam_time_limit_minutes") or 0
+    session_id = uuid4().hex
+    await db.exam_sessions.insert_one(
+        {
+            "_id": session_id,
+            "user_id": user_id,
+            "questions": answer_key,
+            "created_at": now,
+            "expires_at": now + timedelta(minutes=time_limit + EXAM_SESSION_GRACE_MINUTES),
+        }
+    )
+    return ORJSONResponse(response, headers={EXAM_SESSION_HEADER: session_id})
 
 class ExamSubmission(BaseModel):
     answers: dict  # { question_id: "A" | "B" | "C" | "D" }
+    session_id: Optional[str] = None
 
 
-@router.post("/submit")
+async def _answer_key_for(db, user_id: str, session_id: Optional[str], answer_ids) -> dict:
+    if session_id:
+        # Consumed on read so a session is graded once; TTL deletion runs
+        # about once a minute, so expiry is checked here too.
+        session = await db.exam_sessions.find_one_and_delete(
+            {"_id": session_id, "user_id": user_id, "expires_at": {"$gt": datetime.utcnow()}},
+            projection={"questions": 1},
+        )
+        if not session:
+            raise HTTPException(status_code=400, detail="Exam session not found, expired or already submitted")
+        return session["questions"]
+    # Clients that predate X-Exam-Session submit without one.
+    question_ids = [ObjectId(question_id) for question_id in answer_ids if ObjectId.is_valid(question_id)]
+    questions = await db.questions.find(
+        {"_id": {"$in": question_ids}},
+        projection=dict.fromkeys(ANSWER_KEY_FIELDS, 1),
+    ).to_list(length=None)
+    return {str(question["_id"]): question for question in questions}
+
+
+@router.post("/submit", response_class=ORJSONResponse)
 async def submit_exam(
     payload: ExamSubmission,
+    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_user),
     db = Depends(get_database),
 ):
     email = current_user["email"]
+    user_id = current_user["id"]
 
-    user = await db.users.find_one({"email": email})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    profile = await db.student_profiles.find_one({"user_id": str(user["_id"])})
+    profile, questions_by_id = await asyncio.gather(
+        db.student_profiles.find_one({"user_id": user_id}),
+        _answer_key_for(db, user_id, payload.session_id, payload.answers),
+    )
     if not profile:
         raise HTTPException(status_code=400, detail="Profile not found")
+    # Malformed ids, and ids not served in the session, are skipped and
+    # reported rather than graded.
+    invalid_ids = [question_id for question_id in payload.answers if question_id not in questions_by_id]
 
-    score = 0
     total = len(payload.answers)
-    subject_stats = {}
-    incorrect_questions = []
-
-    for question_id, selected in payload.answers.items():
-        question = await db.questions.find_one({"_id": ObjectId(question_id)})
-        if not question:
-            continue
-
-        bucket = subject_bucket_for(question, profile)
-        if bucket:
-            subject_stats.setdefault(bucket, {"correct": 0, "total": 0})
-            subject_stats[bucket]["total"] += 1
-
-        if selected == question["answer"]:
-            score += 1
-            if bucket:
-                subject_stats[bucket]["correct"] += 1
-        else:
-            reference = (
-                f"Review: {question.get('topic')}"
-                if question.get("topic")
-                else "Review this topic"
-            )
-            incorrect_questions.append(
-                {
-                    "id": str(question["_id"]),
-                    "subject": question["subject"],
-                    "topic": question.get("topic"),
-                    "difficulty": question["difficulty"],
-                    "question": question["question"],
-                    "correct_answer": question["answer"],
-                    "student_answer": selected,
-                    "reference": reference,
-                }
-            )
-
+    answered = [
+        (question_id, selected, questions_by_id[question_id])
+        for question_id, selected in payload.answers.items()
+        if question_id in questions_by_id
+    ]
+    graded = [
+        (subject_bucket_for(question, profile), selected == question["answer"])
+        for _, selected, question in answered
+    ]
+    score = sum(is_correct for _, is_correct in graded)
+    bucket_totals = Counter(bucket for bucket, _ in graded if bucket)
+    bucket_correct = Counter(bucket for bucket, is_correct in graded if bucket and is_correct)
+    subject_stats = {
+        bucket: {"correct": bucket_correct[bucket], "total": bucket_total}
+        for bucket, bucket_total in bucket_totals.items()
+    }
+    incorrect_questions = [
+        {
+            "id": question_id,
+            "subject": question["subject"],
+            "topic": question.get("topic"),
+            "difficulty": question["difficulty"],
+            "question": question["question"],
+            "correct_answer": question["answer"],
+            "student_answer": selected,
+            "reference": f"Review: {question.get('topic')}" if question.get("topic") else "Review this topic",
+        }
+        for (question_id, selected, question), (_, is_correct) in zip(answered, graded)
+        if not is_correct
+    ]
     percentage = round((score / total) * 100, 2) if total else 0
     passing_threshold = profile.get("required_passing_threshold", 60)
     result = "PASS" if percentage >= passing_threshold else "FAIL"
 
     exam_result_data = {
-        "user_id": str(user["_id"]),
+        "user_id": user_id,
         "exam_type": profile["target_licensure"],
         "score": score,
         "total": total,
@@ -558,110 +670,158 @@ async def submit_exam(
         "created_at": datetime.utcnow()
     }
     result_insert = await db.exam_results.insert_one(exam_result_data)
-    await _apply_auto_recommendation_reward(
+    set_cached_latest_result(user_id, profile["target_licensure"], result)
+    background_tasks.add_task(
+        _apply_auto_recommendation_reward,
         db=db,
-        user_id=str(user["_id"]),
+        user_id=user_id,
         exam_type=profile["target_licensure"],
         percentage=percentage,
         result=result,
         passing_threshold=passing_threshold,
     )
-    await log_event_async(db, str(user["_id"]), "exam_submit", f"Score {score}/{total} ({percentage}%)")
+    await log_event_async(db, user_id, "exam_submit", f"Score {score}/{total} ({percentage}%)")
 
+    return ORJSONResponse(
+        {
+            "email": email,
+            "exam_type": profile["target_licensure"],
+            "score": score,
+            "total": total,
+            "percentage": percentage,
+            "result": result,
+            "subject_performance": subject_stats,
+            "incorrect_questions": incorrect_questions,
+            "invalid_ids": invalid_ids,
+        }
+    )
+
+
+async def _exam_result_stats(db, program_filter: Optional[str]) -> dict:
+    # Always computed from exam_results: a cached rollup drifts when submits
+    # race with its rebuild or with admin deletes.
+    pipeline = [
+        {"$match": {"exam_type": program_filter} if program_filter else {}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "attempts": {"$sum": 1},
+                    "avg_score": {"$avg": "$percentage"},
+                    "total_answered": {"$sum": "$total"},
+                }},
+            ],
+            "recent": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": 12},
+                {"$project": {
+                    "user_id": 1,
+                    "exam_type": 1,
+                    "percentage": 1,
+                    "score": 1,
+                    "total": 1,
+                    "created_at": 1,
+                }},
+            ],
+        }},
+    ]
+    cursor = await db.exam_results.aggregate(pipeline)
+    facets = (await cursor.to_list(length=1))[0]
+    totals = facets["totals"][0] if facets["totals"] else {}
     return {
-        "email": email,
-        "exam_type": profile["target_licensure"],
-        "score": score,
-        "total": total,
-        "percentage": percentage,
-        "result": result,
-        "subject_performance": subject_stats,
-        "incorrect_questions": incorrect_questions,
+        "attempts": totals.get("attempts", 0),
+        "avg_score": totals.get("avg_score") or 0,
+        "total_answered": totals.get("total_answered", 0),
+        "recent": facets["recent"],
     }
 
 
-@router.get("/stats")
+async def _count_active_students(db, active_user_ids: list, program_filter: Optional[str]) -> int:
+    if not program_filter:
+        return len(active_user_ids)
+    return await db.student_profiles.count_documents(
+        {"user_id": {"$in": active_user_ids}, "target_licensure": program_filter}
+    )
+
+
+async def _active_let_profiles(db, active_user_ids: list, program_filter: Optional[str]) -> list:
+    if program_filter and program_filter != "LET":
+        return []
+    return await db.student_profiles.find(
+        {"user_id": {"$in": active_user_ids}, "target_licensure": "LET"},
+        {"major_specialization": 1, "let_track": 1},
+    ).to_list(length=None)
+
+
+async def _recent_attempt_owners(db, recent_attempts: list) -> dict:
+    user_id_objects = list(
+        {
+            ObjectId(result["user_id"])
+            for result in recent_attempts
+            if result.get("user_id") and ObjectId.is_valid(result["user_id"])
+        }
+    )
+    if not user_id_objects:
+        return {}
+    # One round-trip for the attempt owners and their profiles.
+    cursor = await db.users.aggregate(
+        [
+            {"$match": {"_id": {"$in": user_id_objects}}},
+            {"$project": {"email": 1, "uid": {"$toString": "$_id"}}},
+            {
+                "$lookup": {
+                    "from": "student_profiles",
+                    "localField": "uid",
+                    "foreignField": "user_id",
+                    "as": "profile",
+                }
+            },
+            {"$project": {"_id": 0, "uid": 1, "email": 1, "profile": {"$arrayElemAt": ["$profile", 0]}}},
+        ]
+    )
+    return {user["uid"]: user async for user in cursor}
+
+
+@router.get("/stats", response_class=ORJSONResponse)
 async def get_exam_stats(
     program: Optional[str] = Query(default=None),
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     program_filter = program.strip() if program else None
-    exam_filter = {"exam_type": program_filter} if program_filter else {}
 
-    attempts = await db.exam_results.count_documents(exam_filter)
-    pipeline = [
-        {"$match": exam_filter} if exam_filter else {"$match": {}},
-        {"$group": {"_id": None, "avg_score": {"$avg": "$percentage"}, "total_answered": {"$sum": "$total"}}},
-    ]
-    agg_result = await db.exam_results.aggregate(pipeline).to_list(length=1)
-    avg_score = agg_result[0]["avg_score"] if agg_result else 0
-    total_answered = agg_result[0]["total_answered"] if agg_result else 0
+    stats, settings, active_users = await asyncio.gather(
+        _exam_result_stats(db, program_filter),
+        get_or_create_settings(db),
+        db.users.find({"role": "student", "active": True}, {"_id": 1}).to_list(length=None),
+    )
+    attempts = stats["attempts"]
+    avg_score = stats["avg_score"]
+    total_answered = stats["total_answered"]
+    recent_attempts = stats["recent"]
 
-    settings = await db.app_settings.find_one({})
     total_questions = settings["exam_question_count"] if settings else 50
     completion_rate = (
         round((total_answered / (attempts * total_questions)) * 100, 0)
         if attempts
         else 0
     )
-    active_users = await db.users.find({"role": "student", "active": True}).to_list(length=None)
     active_user_ids = [str(user["_id"]) for user in active_users]
-    if program_filter:
-        active_students = await db.student_profiles.count_documents(
-            {"user_id": {"$in": active_user_ids}, "target_licensure": program_filter}
-        )
-    else:
-        active_students = len(active_user_ids)
-
-    let_profiles = []
-    if not program_filter or program_filter == "LET":
-        let_profiles = await db.student_profiles.find(
-            {"user_id": {"$in": active_user_ids}, "target_licensure": "LET"}
-        ).to_list(length=None)
-    major_counts = {}
-    for profile in let_profiles:
-        label = major_label_for_profile(profile)
-        major_counts[label] = major_counts.get(label, 0) + 1
+    active_students, let_profiles, users_by_id = await asyncio.gather(
+        _count_active_students(db, active_user_ids, program_filter),
+        _active_let_profiles(db, active_user_ids, program_filter),
+        _recent_attempt_owners(db, recent_attempts),
+    )
+    major_counts = Counter(major_label_for_profile(profile) for profile in let_profiles)
     let_major_counts = [
         {"major": label, "count": count}
         for label, count in sorted(major_counts.items(), key=lambda item: (-item[1], item[0]))
     ]
-    recent_results = (
-        await db.exam_results.find(exam_filter).sort("created_at", -1).limit(7).to_list(length=7)
-    )
-    recent_scores = [result["percentage"] for result in reversed(recent_results)]
-    recent_attempts = (
-        await db.exam_results.find(exam_filter).sort("created_at", -1).limit(12).to_list(length=12)
-    )
-    attempt_user_ids = [result.get("user_id") for result in recent_attempts if result.get("user_id")]
-    attempt_user_ids = list({uid for uid in attempt_user_ids})
-    user_id_objects = []
-    for uid in attempt_user_ids:
-        try:
-            user_id_objects.append(ObjectId(uid))
-        except Exception:
-            continue
-    users = (
-        await db.users.find({"_id": {"$in": user_id_objects}}).to_list(length=None)
-        if user_id_objects
-        else []
-    )
-    users_by_id = {str(user["_id"]): user for user in users}
-    profile_ids = [str(user["_id"]) for user in users]
-    profiles = (
-        await db.student_profiles.find({"user_id": {"$in": profile_ids}}).to_list(length=None)
-        if profile_ids
-        else []
-    )
-    profiles_by_user = {profile["user_id"]: profile for profile in profiles}
+    recent_scores = [result["percentage"] for result in recent_attempts[6::-1]]
     recent_attempt_log = []
     for result in recent_attempts:
         user = users_by_id.get(result.get("user_id", ""))
-        profile = profiles_by_user.get(result.get("user_id", ""))
+        profile = user.get("profile") if user else None
         recent_attempt_log.append(
             {
                 "email": user.get("email") if user else "Unknown",
@@ -670,18 +830,20 @@ async def get_exam_stats(
                 "score": result.get("score"),
                 "total": result.get("total"),
                 "major": major_label_for_profile(profile or {}),
-                "created_at": result.get("created_at").isoformat() if result.get("created_at") else None,
+                "created_at": result.get("created_at"),
             }
         )
 
-    return {
-        "avg_score": round(avg_score, 2),
-        "completion_rate": min(completion_rate, 100),
-        "active_students": active_students,
-        "recent_scores": recent_scores,
-        "let_major_counts": let_major_counts,
-        "recent_attempts": recent_attempt_log,
-    }
+    return ORJSONResponse(
+        {
+            "avg_score": round(avg_score, 2),
+            "completion_rate": min(completion_rate, 100),
+            "active_students": active_students,
+            "recent_scores": recent_scores,
+            "let_major_counts": let_major_counts,
+            "recent_attempts": recent_attempt_log,
+        }
+    )
 
 
 @router.get("/history")
@@ -689,11 +851,8 @@ async def get_exam_history(
     current_user=Depends(get_current_user),
     db = Depends(get_database),
 ):
-    user = await db.users.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
     results = (
-        await db.exam_results.find({"user_id": str(user["_id"])})
+        await db.exam_results.find({"user_id": current_user["id"]})
         .sort("created_at", -1)
         .limit(20)
         .to_list(length=20)
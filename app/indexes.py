@@ -0,0 +1,48 @@
+import asyncio
+from pymongo import IndexModel
+
+
+async def ensure_indexes(db):
+    # create_index is a no-op when an identical index already exists.
+    await asyncio.gather(
+        db.audit_logs.create_indexes([
+            # list_audit_logs paging and the retention purge's created_at range.
+            IndexModel([("created_at", -1), ("_id", -1)]),
+            # delete_user removes a user's entries.
+            IndexModel([("user_id", 1)]),
+        ]),
+        db.exam_results.create_indexes([
+            IndexModel([("user_id", 1), ("created_at", -1)]),
+            IndexModel([("user_id", 1), ("exam_type", 1), ("created_at", -1)]),
+            IndexModel([("exam_type", 1), ("created_at", -1)]),
+            IndexModel([("created_at", -1)]),
+        ]),
+        db.questions.create_indexes([
+            IndexModel([("exam_type", 1), ("subject", 1)]),
+            # Non-unique: edits and cleanup can legitimately converge on a key.
+            IndexModel([("question_key", 1)]),
+        ]),
+        db.users.create_index([("role", 1), ("active", 1)]),
+        db.user_access_state.create_index([("action", 1), ("created_at", -1)]),
+        db.exam_sessions.create_index("expires_at", expireAfterSeconds=0),
+    )
+    # Unique last: duplicates in old data must not block the other indexes,
+    # and each one is attempted even if another collection has duplicates.
+    results = await asyncio.gather(
+        db.users.create_index("email", unique=True),
+        db.student_profiles.create_index("user_id", unique=True),
+        db.student_profiles.create_index(
+            "student_id_number",
+            unique=True,
+            partialFilterExpression={"student_id_number": {"$type": "string"}},
+        ),
+        db.student_profiles.create_index(
+            "username",
+            unique=True,
+            partialFilterExpression={"username": {"$type": "string"}},
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"[indexes] Unique index skipped: {result}")
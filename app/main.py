@@ -1,57 +1,96 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from .auth import router as auth_router
 from .profile import router as profile_router
 from .exam import router as exam_router
-from .questions import router as questions_router, seed_questions
+from .questions import router as questions_router, backfill_question_keys, seed_questions
 from .admin import router as admin_router
 from .access import router as access_router
 from .recommend import router as recommend_router
 from .readiness import router as readiness_router
 from .database import get_database
 from .admin import get_or_create_settings
-from .auth import ensure_admin_user
+from .auth import ensure_admin_user, warm_up_password_hashing
+from .audit import AUDIT_RETENTION_DAYS, audit_buffer, migrate_access_state, run_audit_retention
+from .indexes import ensure_indexes
 import os
-from dotenv import load_dotenv
-load_dotenv()
 
-def get_cors_origins():
-    origins = os.getenv("CORS_ORIGINS", "")
-    if origins:
-        return [origin.strip() for origin in origins.split(",") if origin.strip()]
-    return [
-        "http://localhost:5173",
-        "http://localhost:3000",
-        "http://localhost:4173",
-        "null",
-    ]
+DEFAULT_CORS_ORIGINS = (
+    "http://localhost:5173",
+    "http://localhost:3000",
+    "http://localhost:4173",
+    "null",
+)
+CORS_ORIGINS = tuple(
+    origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()
+) or DEFAULT_CORS_ORIGINS
 
 
-app = FastAPI(title="Reviewer Platform API")
+app = FastAPI(title="Reviewer Platform API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=get_cors_origins(),
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Before", "X-Exam-Session"],
 )
 
 
 @app.on_event("startup")
 async def on_startup():
     db = get_database()
-    await seed_questions(db)
-    await get_or_create_settings(db)
-    await ensure_admin_user(db)
+    audit_buffer.start(db)
+    app.state.audit_retention_task = None
+    if AUDIT_RETENTION_DAYS > 0:
+        app.state.audit_retention_task = asyncio.create_task(run_audit_retention(db))
+    try:
+        await ensure_indexes(db)
+    except Exception as exc:
+        print(f"[indexes] Index creation skipped: {exc}")
+    try:
+        await migrate_access_state(db)
+    except Exception as exc:
+        print(f"[audit] Access state backfill skipped: {exc}")
+    try:
+        await backfill_question_keys(db)
+    except Exception as exc:
+        print(f"[questions] Question key backfill skipped: {exc}")
+    await asyncio.gather(
+        seed_questions(db),
+        get_or_create_settings(db),
+        ensure_admin_user(db),
+        asyncio.to_thread(warm_up_password_hashing),
+    )
+    app.state.warmup_task = None
+    if os.getenv("MODEL_WARMUP_MODE", "sync").lower() == "async":
+        app.state.warmup_task = asyncio.create_task(warm_up_models())
+    else:
+        await warm_up_models()
+
+
+async def warm_up_models():
     try:
         from .readiness import ensure_models_exist
-        ensure_models_exist()
+        await asyncio.to_thread(ensure_models_exist)
     except Exception as exc:
         print(f"[readiness] Model auto-generation skipped: {exc}")
 
 
-app.include_router(auth_router)
+def _warming_up() -> bool:
+    task = getattr(app.state, "warmup_task", None)
+    return task is not None and not task.done()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    task = getattr(app.state, "audit_retention_task", None)
+    if task is not None:
+        task.cancel()
+    await audit_buffer.stop()
 
 
 @app.get("/")
@@ -59,10 +98,28 @@ def root():
     return {"status": "FastAPI backend is running"}
 
 
-app.include_router(profile_router)
-app.include_router(exam_router)
-app.include_router(questions_router)
-app.include_router(admin_router)
-app.include_router(access_router)
-app.include_router(recommend_router)
-app.include_router(readiness_router)
+@app.get("/health")
+def health():
+    return {"status": "warming" if _warming_up() else "ok"}
+
+
+@app.get("/ready")
+def ready():
+    if _warming_up():
+        return ORJSONResponse({"status": "warming"}, status_code=503)
+    return {"status": "ready"}
+
+
+# Each router carries its own prefix and is included exactly once, so every
+# route is copied a single time and picks up the app's ORJSONResponse default.
+for router in (
+    auth_router,
+    profile_router,
+    exam_router,
+    questions_router,
+    admin_router,
+    access_router,
+    recommend_router,
+    readiness_router,
+):
+    app.include_router(router)
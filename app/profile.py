@@ -1,7 +1,13 @@
+import asyncio
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from .models import StudentProfile as StudentProfileSchema
 from .auth import get_current_user
+from .admin import get_or_create_settings
 from .database import get_database
 from .db_models import StudentProfile, User
 from .audit import log_event_async
@@ -9,71 +15,99 @@ from .licensure import DEFAULT_TARGET_LICENSURE_OPTIONS
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
+LET_TRACKS = frozenset({"Elementary", "Secondary"})
+LET_SECONDARY_MAJORS = frozenset({"Mathematics", "Filipino", "Social Studies", "English"})
+PROFILE_FIELDS = (
+    "student_id_number",
+    "first_name",
+    "middle_name",
+    "last_name",
+    "email_address",
+    "username",
+    "program_degree",
+    "year_level",
+    "section_class",
+    "status",
+    "target_licensure",
+    "let_track",
+    "major_specialization",
+    "assigned_review_subjects",
+    "required_passing_threshold",
+)
+
 def profile_to_dict(profile):
-    return {
-        "student_id_number": profile["student_id_number"],
-        "first_name": profile["first_name"],
-        "middle_name": profile["middle_name"],
-        "last_name": profile["last_name"],
-        "email_address": profile["email_address"],
-        "username": profile["username"],
-        "program_degree": profile["program_degree"],
-        "year_level": profile["year_level"],
-        "section_class": profile.get("section_class"),
-        "status": profile["status"],
-        "target_licensure": profile["target_licensure"],
-        "let_track": profile.get("let_track"),
-        "major_specialization": profile["major_specialization"],
-        "assigned_review_subjects": profile["assigned_review_subjects"],
-        "required_passing_threshold": profile["required_passing_threshold"],
-        "can_edit_profile": bool(profile.get("can_edit_profile", False)),
-    }
+    data = {field: profile.get(field) for field in PROFILE_FIELDS}
+    data["can_edit_profile"] = bool(profile.get("can_edit_profile", False))
+    return data
+
+
+# Rules parsed from the last licensure options list seen. Settings are served
+# from settings_cache, so the same list object comes back until it changes.
+_licensure_rules_cache = (None, {})
+
+
+def _licensure_rules(licensure_options) -> dict:
+    global _licensure_rules_cache
+    cached_options, cached_rules = _licensure_rules_cache
+    if cached_options is licensure_options:
+        return cached_rules
+    rules = {}
+    for option in licensure_options:
+        name = str(option.get("name", "")).strip()
+        subjects = frozenset(
+            str(subject).strip() for subject in option.get("subjects", []) if str(subject).strip()
+        )
+        threshold = option.get("passing_threshold", 75)
+        if not name or not subjects:
+            continue
+        rules[name.lower()] = {
+            "name": name,
+            "subjects": subjects,
+            "subjects_without_specialization": subjects - {"Specialization"},
+            "passing_threshold": int(threshold),
+        }
+    _licensure_rules_cache = (licensure_options, rules)
+    return rules
+
+
+def _duplicate_detail(exc: DuplicateKeyError) -> str:
+    key_pattern = (exc.details or {}).get("keyPattern") or {}
+    if "student_id_number" in key_pattern:
+        return "Student ID already in use"
+    if "username" in key_pattern:
+        return "Username already in use"
+    return "Profile already exists"
 
 
-@router.get("")
+@router.get("", response_class=ORJSONResponse)
 async def get_profile(
     current_user=Depends(get_current_user),
     db = Depends(get_database),
 ):
-    user = await db.users.find_one({"email": current_user["email"]})
+    user, profile = await asyncio.gather(
+        db.users.find_one({"_id": ObjectId(current_user["id"])}, {"profile_edit_allowed": 1}),
+        db.student_profiles.find_one({"user_id": current_user["id"]}),
+    )
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-
-    profile = await db.student_profiles.find_one({"user_id": str(user["_id"])})
     if not profile:
-        return None
+        return ORJSONResponse(None)
     profile["can_edit_profile"] = bool(user.get("profile_edit_allowed", False))
-    return profile_to_dict(profile)
+    return ORJSONResponse(profile_to_dict(profile))
 
 
-@router.post("")
+@router.post("", response_class=ORJSONResponse)
 async def save_profile(
     profile: StudentProfileSchema,
     current_user=Depends(get_current_user),
     db = Depends(get_database),
 ):
-    user = await db.users.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    if profile.email_address.lower() != user["email"].lower():
+    if profile.email_address.lower() != current_user["email"].lower():
         raise HTTPException(status_code=400, detail="Email must match account email")
 
-    app_settings = await db.app_settings.find_one({}) or {}
+    app_settings = await get_or_create_settings(db)
     licensure_options = app_settings.get("target_licensure_options") or DEFAULT_TARGET_LICENSURE_OPTIONS
-    licensure_rules = {}
-    for option in licensure_options:
-        name = str(option.get("name", "")).strip()
-        subjects = [str(subject).strip() for subject in option.get("subjects", []) if str(subject).strip()]
-        threshold = option.get("passing_threshold", 75)
-        if not name or not subjects:
-            continue
-        licensure_rules[name.lower()] = {
-            "name": name,
-            "subjects": subjects,
-            "passing_threshold": int(threshold),
-        }
-
+    licensure_rules = _licensure_rules(licensure_options)
     target_licensure_name = str(profile.target_licensure or "").strip()
     rule = licensure_rules.get(target_licensure_name.lower())
     if not rule:
@@ -81,10 +115,10 @@ async def save_profile(
     profile.target_licensure = rule["name"]
 
     if profile.target_licensure == "LET":
-        if profile.let_track not in {"Elementary", "Secondary"}:
+        if profile.let_track not in LET_TRACKS:
             raise HTTPException(status_code=400, detail="LET track is required")
         if profile.let_track == "Secondary":
-            if profile.major_specialization not in {"Mathematics", "Filipino", "Social Studies", "English"}:
+            if profile.major_specialization not in LET_SECONDARY_MAJORS:
                 raise HTTPException(status_code=400, detail="LET major is required for Secondary")
         else:
             profile.major_specialization = "Elementary"
@@ -100,81 +134,79 @@ async def save_profile(
             detail=f"Passing threshold must be {expected_threshold} for {profile.target_licensure}",
         )
 
-    allowed_subjects = set(rule["subjects"])
     if profile.target_licensure == "LET" and profile.let_track == "Elementary":
-        allowed_subjects.discard("Specialization")
+        allowed_subjects = rule["subjects_without_specialization"]
+    else:
+        allowed_subjects = rule["subjects"]
     if not profile.assigned_review_subjects:
         raise HTTPException(status_code=400, detail="Assigned review subjects are required")
     if not set(profile.assigned_review_subjects).issubset(allowed_subjects):
         raise HTTPException(status_code=400, detail="Invalid review subjects for licensure")
 
-    existing_student_id = await db.student_profiles.find_one(
-        {"student_id_number": profile.student_id_number, "user_id": {"$ne": str(user["_id"])}}
-    )
-    if existing_student_id:
+    user_id = current_user["id"]
+    # One read covers both uniqueness checks and the caller's own profile.
+    candidates = await db.student_profiles.find(
+        {"$or": [
+            {"student_id_number": profile.student_id_number},
+            {"username": profile.username},
+            {"user_id": user_id},
+        ]},
+        {"student_id_number": 1, "username": 1, "user_id": 1},
+    ).to_list(length=None)
+    others = [doc for doc in candidates if doc.get("user_id") != user_id]
+    if any(doc.get("student_id_number") == profile.student_id_number for doc in others):
         raise HTTPException(status_code=400, detail="Student ID already in use")
-    existing_username = await db.student_profiles.find_one(
-        {"username": profile.username, "user_id": {"$ne": str(user["_id"])}}
-    )
-    if existing_username:
+    if any(doc.get("username") == profile.username for doc in others):
         raise HTTPException(status_code=400, detail="Username already in use")
 
-    existing = await db.student_profiles.find_one({"user_id": str(user["_id"])})
+    existing = next((doc for doc in candidates if doc.get("user_id") == user_id), None)
+    profile_data = {
+        "student_id_number": profile.student_id_number,
+        "first_name": profile.first_name,
+        "middle_name": profile.middle_name,
+        "last_name": profile.last_name,
+        "email_address": profile.email_address,
+        "username": profile.username,
+        "program_degree": profile.program_degree,
+        "year_level": profile.year_level,
+        "section_class": profile.section_class,
+        "status": profile.status,
+        "target_licensure": profile.target_licensure,
+        "let_track": profile.let_track,
+        "major_specialization": profile.major_specialization,
+        "assigned_review_subjects": profile.assigned_review_subjects,
+        "required_passing_threshold": profile.required_passing_threshold,
+        "updated_at": datetime.utcnow(),
+    }
     if existing:
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"profile_edit_allowed": 1})
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
         if not user.get("profile_edit_allowed", False):
             raise HTTPException(
                 status_code=403,
                 detail="Profile editing is disabled. Ask admin for permission.",
             )
-        await db.student_profiles.update_one(
-            {"_id": existing["_id"]},
-            {"$set": {
-                "student_id_number": profile.student_id_number,
-                "first_name": profile.first_name,
-                "middle_name": profile.middle_name,
-                "last_name": profile.last_name,
-                "email_address": profile.email_address,
-                "username": profile.username,
-                "program_degree": profile.program_degree,
-                "year_level": profile.year_level,
-                "section_class": profile.section_class,
-                "status": profile.status,
-                "target_licensure": profile.target_licensure,
-                "let_track": profile.let_track,
-                "major_specialization": profile.major_specialization,
-                "assigned_review_subjects": profile.assigned_review_subjects,
-                "required_passing_threshold": profile.required_passing_threshold,
-                "updated_at": datetime.utcnow()
-            }}
-        )
+        try:
+            saved = await db.student_profiles.find_one_and_update(
+                {"_id": existing["_id"]},
+                {"$set": profile_data},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError as exc:
+            raise HTTPException(status_code=400, detail=_duplicate_detail(exc))
         await db.users.update_one(
             {"_id": user["_id"]},
             {"$set": {"profile_edit_allowed": False}},
         )
-        saved = await db.student_profiles.find_one({"_id": existing["_id"]})
     else:
-        profile_data = {
-            "user_id": str(user["_id"]),
-            "student_id_number": profile.student_id_number,
-            "first_name": profile.first_name,
-            "middle_name": profile.middle_name,
-            "last_name": profile.last_name,
-            "email_address": profile.email_address,
-            "username": profile.username,
-            "program_degree": profile.program_degree,
-            "year_level": profile.year_level,
-            "section_class": profile.section_class,
-            "status": profile.status,
-            "target_licensure": profile.target_licensure,
-            "let_track": profile.let_track,
-            "major_specialization": profile.major_specialization,
-            "assigned_review_subjects": profile.assigned_review_subjects,
-            "required_passing_threshold": profile.required_passing_threshold,
-            "updated_at": datetime.utcnow(),
-        }
-        result = await db.student_profiles.insert_one(profile_data)
-        saved = await db.student_profiles.find_one({"_id": result.inserted_id})
+        profile_data["user_id"] = user_id
+        try:
+            await db.student_profiles.insert_one(profile_data)
+        except DuplicateKeyError as exc:
+            raise HTTPException(status_code=400, detail=_duplicate_detail(exc))
+        saved = profile_data
 
-    await log_event_async(db, str(user["_id"]), "profile_save", "Student profile saved")
+    await log_event_async(db, user_id, "profile_save", "Student profile saved")
 
-    return profile_to_dict(saved)
+    return ORJSONResponse(profile_to_dict(saved))
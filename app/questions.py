@@ -1,34 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from pydantic import BaseModel, validator
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Literal, Optional
 from bson import ObjectId
-from .auth import get_current_user
+from pymongo import ReturnDocument, UpdateOne, WriteConcern
+from .auth import require_staff
 from .database import get_database
 from .db_models import Question
+import asyncio
+import codecs
 import csv
+import hashlib
 import io
+import orjson
 import re
 
 router = APIRouter(prefix="/questions", tags=["Questions"])
 
+CSV_UPSERT_BATCH_SIZE = 500
+CSV_ERROR_LIMIT = 20
+CSV_VALIDATE_CHUNK_SIZE = 1 << 16
+QUESTION_STREAM_BATCH_SIZE = 500
+CLEANUP_BATCH_SIZE = 500
+ALLOWED_DIFFICULTIES = frozenset({"Easy", "Medium", "Hard"})
+ALLOWED_ANSWERS = frozenset({"A", "B", "C", "D"})
+OPTION_KEYS = ("a", "b", "c", "d")
+QUESTION_KEY_FIELDS = (
+    "exam_type",
+    "subject",
+    "topic",
+    "difficulty",
+    "question",
+    "a",
+    "b",
+    "c",
+    "d",
+    "answer",
+    "rationale",
+)
+REQUIRED_QUESTION_FIELDS = ("exam_type", "subject", "topic", "difficulty", "question", "a", "b", "c", "d", "answer")
+# Cleanup validates and re-keys questions, which needs the key fields only.
+CLEANUP_PROJECTION = dict.fromkeys(QUESTION_KEY_FIELDS, 1)
+# The same fields question_to_dict renders; listed rows are laid over a
+# template so missing fields still go out as null, in the same key order.
+QUESTION_LIST_PROJECTION = dict.fromkeys(QUESTION_KEY_FIELDS, 1)
+QUESTION_ROW_TEMPLATE = dict.fromkeys(QUESTION_KEY_FIELDS)
+
 
 class QuestionCreate(BaseModel):
     exam_type: str
     subject: str
     topic: str
-    difficulty: str
+    difficulty: Literal["Easy", "Medium", "Hard"]
     question: str
     a: str
     b: str
     c: str
     d: str
-    answer: str
-
-    @validator("answer")
-    def answer_must_be_option(cls, v):
-        if v not in {"A", "B", "C", "D"}:
-            raise ValueError("Answer must be one of A, B, C, or D")
-        return v
+    answer: Literal["A", "B", "C", "D"]
 
 
 class QuestionUpdate(BaseModel):
@@ -87,6 +116,13 @@ WATERMARK_PATTERNS = [
     r"Get more Free LET Reviewers.*",
     r"www\.teachpinas\.com.*",
 ]
+# Each watermark runs to the end of its line, so one alternation removes the
+# same text as applying the patterns one after another.
+WATERMARK_RE = re.compile("|".join(f"(?:{pattern})" for pattern in WATERMARK_PATTERNS), re.IGNORECASE)
+# Every watermark contains one of these; clean text skips the regex pass.
+WATERMARK_MARKERS = ("teachpinas", "get more free let reviewers")
+TRAILING_NUMBER = re.compile(r"(?:^|\s|\.)\d{1,3}\.")
+GLUED_TRAILING_NUMBER = re.compile(r"(?<=[A-Za-z)])\d{1,3}\.")
 
 OPTION_MARKERS = re.compile(r"\b[A-D]\.\s", re.IGNORECASE)
 
@@ -95,15 +131,19 @@ def sanitize_text(value: str) -> str:
     if not value:
         return value
     text = value.strip()
-    for pattern in WATERMARK_PATTERNS:
-        text = re.sub(pattern, "", text, flags=re.IGNORECASE).strip()
+    lowered = text.lower()
+    if any(marker in lowered for marker in WATERMARK_MARKERS):
+        text = WATERMARK_RE.sub("", text).strip()
+    if "." not in text:
+        # Both appended-number patterns need a digit followed by a period.
+        return text
     # If another question number was accidentally appended, truncate it.
-    match = re.search(r"(?:^|\s|\.)\d{1,3}\.", text)
+    match = TRAILING_NUMBER.search(text)
     if match:
         text = text[: match.start()].strip()
     else:
         # Handle cases like "weight59." (no space before number)
-        match = re.search(r"(?<=[A-Za-z)])\d{1,3}\.", text)
+        match = GLUED_TRAILING_NUMBER.search(text)
         if match:
             text = text[: match.start()].strip()
     return text
@@ -112,269 +152,169 @@ def sanitize_text(value: str) -> str:
 def has_embedded_options(text: str) -> bool:
     if not text:
         return False
-    return len(OPTION_MARKERS.findall(text)) >= 2
+    # Stop at the second marker instead of collecting every match.
+    markers = OPTION_MARKERS.finditer(text)
+    next(markers, None)
+    return next(markers, None) is not None
 
 
 def is_invalid_question(data: dict) -> bool:
-    required_fields = ["exam_type", "subject", "topic", "difficulty", "question", "a", "b", "c", "d", "answer"]
-    for field in required_fields:
-        value = (data.get(field) or "").strip()
-        if not value:
-            return True
-
-    if data.get("difficulty") not in {"Easy", "Medium", "Hard"}:
+    get = data.get
+    # Set lookups first; they are cheaper than stripping every field.
+    if get("difficulty") not in ALLOWED_DIFFICULTIES:
         return True
-    if data.get("answer") not in {"A", "B", "C", "D"}:
+    if get("answer") not in ALLOWED_ANSWERS:
         return True
+    for field in REQUIRED_QUESTION_FIELDS:
+        if not (get(field) or "").strip():
+            return True
 
     # Guard against merged questions/options in a single field.
-    if has_embedded_options(data.get("question", "")):
+    if has_embedded_options(get("question", "")):
         return True
-    for option_key in ["a", "b", "c", "d"]:
-        if has_embedded_options(data.get(option_key, "")):
+    for option_key in OPTION_KEYS:
+        if has_embedded_options(get(option_key, "")):
             return True
 
     return False
 
 
-def map_csv_row(row: dict) -> dict:
-    # Support both LET template headers and CPA template headers
-    def pick(*keys):
-        for key in keys:
-            if key in row and row[key] is not None:
-                return str(row[key]).strip()
-        return ""
+# Support both LET template headers and CPA template headers; the first
+# alias present in the header row wins.
+CSV_COLUMN_ALIASES = {
+    "exam_type": ("exam_type", "exam_typ"),
+    "subject": ("subject", "major_sub"),
+    "topic": ("topic",),
+    "difficulty": ("difficulty",),
+    "question": ("question",),
+    "a": ("a", "choice_a"),
+    "b": ("b", "choice_b"),
+    "c": ("c", "choice_c"),
+    "d": ("d", "choice_d"),
+    "answer": ("answer",),
+    "rationale": ("rationale",),
+}
+
+
+def csv_column_indexes(headers: list) -> dict:
+    positions = {header: index for index, header in enumerate(headers)}
+    columns = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    return columns
+
+
+def map_csv_row(row: list, columns: dict) -> dict:
+    def pick(field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None else ""
 
     return {
-        "exam_type": pick("exam_type", "exam_typ"),
-        "subject": normalize_subject(pick("subject", "major_sub")),
+        "exam_type": pick("exam_type"),
+        "subject": normalize_subject(pick("subject")),
         "topic": sanitize_text(pick("topic")),
         "difficulty": normalize_difficulty(pick("difficulty")),
         "question": sanitize_text(pick("question")),
-        "a": sanitize_text(pick("a", "choice_a")),
-        "b": sanitize_text(pick("b", "choice_b")),
-        "c": sanitize_text(pick("c", "choice_c")),
-        "d": sanitize_text(pick("d", "choice_d")),
+        "a": sanitize_text(pick("a")),
+        "b": sanitize_text(pick("b")),
+        "c": sanitize_text(pick("c")),
+        "d": sanitize_text(pick("d")),
         "answer": pick("answer").upper(),
         "rationale": sanitize_text(pick("rationale")),
     }
 
 
-def build_question_key(data: dict) -> str:
-    # Normalize to detect duplicates across uploads/edits.
-    def norm(value: str) -> str:
-        return " ".join((value or "").strip().lower().split())
-
-    return "|".join(
-        [
-            norm(data.get("exam_type")),
-            norm(data.get("subject")),
-            norm(data.get("topic")),
-            norm(data.get("difficulty")),
-            norm(data.get("question")),
-            norm(data.get("a")),
-            norm(data.get("b")),
-            norm(data.get("c")),
-            norm(data.get("d")),
-            norm(data.get("answer")),
-            norm(data.get("rationale")),
-        ]
-    )
+def _normalize_key_part(value: str) -> str:
+    value = (value or "").strip().lower()
+    # Spaces are the only printable whitespace, so a printable value without
+    # double spaces is already collapsed and needs no split/join.
+    if value.isprintable() and "  " not in value:
+        return value
+    return " ".join(value.split())
+
+
+def build_question_key(data: dict) -> bytes:
+    # Normalize to detect duplicates across uploads/edits. The digest keeps
+    # index entries at 16 bytes however long the question text is.
+    text = "|".join(_normalize_key_part(data.get(field)) for field in QUESTION_KEY_FIELDS)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+async def backfill_question_keys(db):
+    # Questions saved before keys were hashed still carry the joined text.
+    operations = []
+    async for doc in db.questions.find({"question_key": {"$type": "string"}}, CLEANUP_PROJECTION):
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"question_key": build_question_key(doc)}}))
+        if len(operations) >= CLEANUP_BATCH_SIZE:
+            await db.questions.bulk_write(operations, ordered=False)
+            operations.clear()
+    if operations:
+        await db.questions.bulk_write(operations, ordered=False)
 
 
 def sanitize_question_doc(doc: dict) -> dict:
+    # Only fields that sanitizing actually changes, so clean docs need no write.
     cleaned = {}
     for field in ["topic", "question", "a", "b", "c", "d", "rationale"]:
-        if field in doc and doc[field] is not None:
-            cleaned[field] = sanitize_text(str(doc[field]))
+        value = doc.get(field)
+        if value is None:
+            continue
+        text = sanitize_text(str(value))
+        if text != value:
+            cleaned[field] = text
     if cleaned:
         cleaned["question_key"] = build_question_key({**doc, **cleaned})
     return cleaned
 
 
-DEFAULT_QUESTIONS = [
-    {
-        "exam_type": "LET",
-        "subject": "GenEd",
-        "topic": "Reading",
-        "difficulty": "Easy",
-        "question": "What is the main idea of a paragraph?",
-        "a": "The supporting details",
-        "b": "The topic sentence",
-        "c": "The conclusion",
-        "d": "The title",
-        "answer": "B",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "GenEd",
-        "topic": "Math",
-        "difficulty": "Medium",
-        "question": "What is the value of 3/4 + 1/8?",
-        "a": "5/8",
-        "b": "7/8",
-        "c": "1",
-        "d": "9/8",
-        "answer": "B",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "GenEd",
-        "topic": "Science",
-        "difficulty": "Hard",
-        "question": "Which layer of the Earth is liquid?",
-        "a": "Inner core",
-        "b": "Mantle",
-        "c": "Outer core",
-        "d": "Crust",
-        "answer": "C",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "Mathematics",
-        "topic": "Algebra",
-        "difficulty": "Medium",
-        "question": "What is x if 2x + 4 = 10?",
-        "a": "2",
-        "b": "3",
-        "c": "4",
-        "d": "5",
-        "answer": "B",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "Science",
-        "topic": "Biology",
-        "difficulty": "Easy",
-        "question": "Which organelle is the powerhouse of the cell?",
-        "a": "Nucleus",
-        "b": "Mitochondria",
-        "c": "Ribosome",
-        "d": "Golgi apparatus",
-        "answer": "B",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "Social Studies",
-        "topic": "History",
-        "difficulty": "Medium",
-        "question": "Who wrote the Philippine novel Noli Me Tangere?",
-        "a": "Jose Rizal",
-        "b": "Andres Bonifacio",
-        "c": "Emilio Aguinaldo",
-        "d": "Apolinario Mabini",
-        "answer": "A",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "English",
-        "topic": "Grammar",
-        "difficulty": "Easy",
-        "question": "Choose the correct verb: She ___ to the store yesterday.",
-        "a": "go",
-        "b": "goes",
-        "c": "went",
-        "d": "gone",
-        "answer": "C",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "Filipino",
-        "topic": "Wika",
-        "difficulty": "Medium",
-        "question": "Alin ang tamang baybay?",
-        "a": "Tagumpay",
-        "b": "Tagumpaey",
-        "c": "Tagumpai",
-        "d": "Tagumpae",
-        "answer": "A",
-    },
-    {
-        "exam_type": "LET",
-        "subject": "P.E",
-        "topic": "Fitness",
-        "difficulty": "Easy",
-        "question": "Ilang minuto ang inirerekomendang moderate exercise kada linggo?",
-        "a": "30",
-        "b": "60",
-        "c": "150",
-        "d": "300",
-        "answer": "C",
-    },
-    {
-        "exam_type": "CPA",
-        "subject": "FAR",
-        "topic": "Assets",
-        "difficulty": "Hard",
-        "question": "Which asset is measured at amortized cost?",
-        "a": "Equity securities",
-        "b": "Trading securities",
-        "c": "Held-to-maturity investments",
-        "d": "Derivatives",
-        "answer": "C",
-    },
-    {
-        "exam_type": "CPA",
-        "subject": "Taxation",
-        "topic": "VAT",
-        "difficulty": "Medium",
-        "question": "What is the standard VAT rate in the Philippines?",
-        "a": "8%",
-        "b": "10%",
-        "c": "12%",
-        "d": "15%",
-        "answer": "C",
-    },
-    {
-        "exam_type": "CPA",
-        "subject": "Auditing",
-        "topic": "Opinion",
-        "difficulty": "Easy",
-        "question": "Which opinion is issued when statements are free of material misstatement?",
-        "a": "Qualified",
-        "b": "Adverse",
-        "c": "Disclaimer",
-        "d": "Unmodified",
-        "answer": "D",
-    },
-]
-
-
 async def seed_questions(db):
-    count = await db.questions.count_documents({})
-    if count > 0:
+    # Metadata counts can drift after an unclean shutdown; one _id is exact
+    # and just as cheap.
+    if await db.questions.find_one({}, {"_id": 1}) is not None:
         return
-    for item in DEFAULT_QUESTIONS:
-        item["question_key"] = build_question_key(item)
-        await db.questions.update_one(
-            {"question_key": item["question_key"]},
-            {"$set": item},
-            upsert=True,
-        )
+    from .default_questions import DEFAULT_QUESTIONS
+
+    # Upserts keep seeding idempotent when several workers start at once.
+    operations = [
+        UpdateOne({"question_key": item["question_key"]}, {"$set": item}, upsert=True)
+        for item in DEFAULT_QUESTIONS
+    ]
+    seed_collection = db.questions.with_options(write_concern=WriteConcern(w=0))
+    await seed_collection.bulk_write(operations, ordered=False)
 
 
 @router.get("")
 async def list_questions(
     exam_type: Optional[str] = None,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
     query = {}
     if exam_type:
         query["exam_type"] = exam_type.strip()
-    questions = await db.questions.find(query).to_list(length=None)
-    return [question_to_dict(q) for q in questions]
+    cursor = db.questions.find(query, QUESTION_LIST_PROJECTION).batch_size(QUESTION_STREAM_BATCH_SIZE)
+
+    async def rows():
+        yield b"["
+        first = True
+        async for question in cursor:
+            row = {"id": str(question.pop("_id")), **QUESTION_ROW_TEMPLATE, **question}
+            chunk = orjson.dumps(row)
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    return StreamingResponse(rows(), media_type="application/json")
 
 
 @router.get("/summary")
 async def question_summary(
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
     let_count = await db.questions.count_documents({"exam_type": "LET"})
     cpa_count = await db.questions.count_documents({"exam_type": "CPA"})
     return {"LET": let_count, "CPA": cpa_count}
@@ -383,16 +323,9 @@ async def question_summary(
 @router.post("")
 async def add_question(
     payload: QuestionCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    allowed_difficulty = {"Easy", "Medium", "Hard"}
-    if payload.difficulty not in allowed_difficulty:
-        raise HTTPException(status_code=400, detail="Invalid difficulty")
-
     question_data = {
         "exam_type": payload.exam_type,
         "subject": normalize_subject(payload.subject),
@@ -406,22 +339,23 @@ async def add_question(
         "answer": payload.answer,
     }
     question_data["question_key"] = build_question_key(question_data)
-    await db.questions.update_one(
+    saved = await db.questions.find_one_and_update(
         {"question_key": question_data["question_key"]},
         {"$set": question_data},
+        projection={"_id": 1},
         upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
+    question_data["_id"] = saved["_id"]
     return question_to_dict(question_data)
 
 
 
 @router.delete("")
 async def clear_questions(
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
     result = await db.questions.delete_many({})
     return {"deleted": result.deleted_count}
 
@@ -430,12 +364,9 @@ async def clear_questions(
 async def update_question(
     question_id: str,
     payload: QuestionUpdate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     try:
         oid = ObjectId(question_id)
     except Exception:
@@ -458,12 +389,12 @@ async def update_question(
         updates["d"] = sanitize_text(payload.d)
     if payload.answer is not None:
         answer = payload.answer.strip().upper()
-        if answer not in {"A", "B", "C", "D"}:
+        if answer not in ALLOWED_ANSWERS:
             raise HTTPException(status_code=400, detail="Answer must be A, B, C, or D")
         updates["answer"] = answer
     if payload.difficulty is not None:
         diff = normalize_difficulty(payload.difficulty)
-        if diff not in {"Easy", "Medium", "Hard"}:
+        if diff not in ALLOWED_DIFFICULTIES:
             raise HTTPException(status_code=400, detail="Invalid difficulty")
         updates["difficulty"] = diff
 
@@ -478,135 +409,185 @@ async def update_question(
 
 @router.post("/cleanup")
 async def cleanup_questions(
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     updated = 0
     deleted = 0
-    async for doc in db.questions.find({}):
+    delete_ids = []
+    update_ops = []
+
+    async def flush():
+        nonlocal updated, deleted
+        if delete_ids:
+            result = await db.questions.delete_many({"_id": {"$in": delete_ids}})
+            deleted += result.deleted_count
+            delete_ids.clear()
+        if update_ops:
+            result = await db.questions.bulk_write(update_ops, ordered=False)
+            updated += result.modified_count
+            update_ops.clear()
+
+    async for doc in db.questions.find({}, CLEANUP_PROJECTION):
         cleaned = sanitize_question_doc(doc)
         merged = {**doc, **cleaned} if cleaned else doc
         if is_invalid_question(merged):
-            await db.questions.delete_one({"_id": doc["_id"]})
-            deleted += 1
-            continue
-        if cleaned:
-            await db.questions.update_one({"_id": doc["_id"]}, {"$set": cleaned})
-            updated += 1
+            delete_ids.append(doc["_id"])
+        elif cleaned:
+            update_ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": cleaned}))
+        if len(delete_ids) + len(update_ops) >= CLEANUP_BATCH_SIZE:
+            await flush()
+    await flush()
 
     return {"updated": updated, "deleted": deleted}
 
 
+async def _flush_upserts(db, operations: list) -> int:
+    result = await db.questions.bulk_write(operations, ordered=False)
+    return result.upserted_count + result.modified_count
+
+
+class QuestionCsvParser:
+    def __init__(self, stream):
+        sample = stream.read(4096)
+        stream.seek(0)
+        sniffer = csv.Sniffer()
+        delimiter = ","
+        try:
+            dialect = sniffer.sniff(sample, delimiters=[",", ";", "\t"])
+            delimiter = dialect.delimiter
+        except Exception:
+            delimiter = ","
+
+        self._reader = csv.reader(stream, delimiter=delimiter)
+        try:
+            headers = next(self._reader)
+        except StopIteration:
+            raise HTTPException(status_code=400, detail="CSV is empty.")
+
+        headers = [h.strip() for h in headers]
+        fieldnames = set(headers)
+        required_any = {"exam_type", "exam_typ"}
+        required_common = {"topic", "difficulty", "question", "answer"}
+        required_choices = {"a", "b", "c", "d"}
+        required_choices_alt = {"choice_a", "choice_b", "choice_c", "choice_d"}
+        required_subject = {"subject", "major_sub"}
+
+        if not (fieldnames & required_any):
+            raise HTTPException(status_code=400, detail="CSV must include exam_type or exam_typ.")
+        if not (fieldnames & required_subject):
+            raise HTTPException(status_code=400, detail="CSV must include subject or major_sub.")
+        if not required_common.issubset(fieldnames):
+            raise HTTPException(
+                status_code=400,
+                detail="CSV must include topic, difficulty, question, and answer.",
+            )
+        if not (required_choices.issubset(fieldnames) or required_choices_alt.issubset(fieldnames)):
+            raise HTTPException(
+                status_code=400,
+                detail="CSV must include either a,b,c,d or choice_a,choice_b,choice_c,choice_d.",
+            )
+
+        self._headers = headers
+        self._question_idx = headers.index("question") if "question" in headers else None
+        self._columns = csv_column_indexes(headers)
+        self.skipped = 0
+        self.errors = []
+
+    def _skip(self, reason: str):
+        self.skipped += 1
+        if len(self.errors) < CSV_ERROR_LIMIT:
+            self.errors.append({"row": self._reader.line_num, "reason": reason})
+
+    def next_batch(self, size: int) -> list:
+        # Returns up to `size` valid questions; an empty list means end of file.
+        headers = self._headers
+        question_idx = self._question_idx
+        docs = []
+        for row in self._reader:
+            if not row or all(not str(cell).strip() for cell in row):
+                continue
+            row_num = self._reader.line_num
+            if question_idx is not None and len(row) > len(headers):
+                extra = len(row) - len(headers)
+                merged_question = ",".join(row[question_idx : question_idx + extra + 1])
+                row = (
+                    row[:question_idx]
+                    + [merged_question]
+                    + row[question_idx + extra + 1 :]
+                )
+            if len(row) < len(headers):
+                row = row + [""] * (len(headers) - len(row))
+
+            mapped = map_csv_row(row, self._columns)
+            if is_invalid_question(mapped):
+                missing = [
+                    f
+                    for f in REQUIRED_QUESTION_FIELDS
+                    if not (mapped.get(f) or "").strip()
+                ]
+                if missing:
+                    self._skip(f"Row {row_num}: missing field(s) — {', '.join(missing)}")
+                elif mapped.get("difficulty") not in ALLOWED_DIFFICULTIES:
+                    self._skip(f"Row {row_num}: invalid difficulty '{mapped.get('difficulty')}' (use Easy, Medium, Hard)")
+                elif mapped.get("answer") not in ALLOWED_ANSWERS:
+                    self._skip(f"Row {row_num}: invalid answer '{mapped.get('answer')}' (use A, B, C, or D)")
+                elif has_embedded_options(mapped.get("question", "")):
+                    self._skip(f"Row {row_num}: question text contains embedded options (A/B/C/D)")
+                else:
+                    self._skip(f"Row {row_num}: invalid or incomplete data")
+                continue
+            mapped["question_key"] = build_question_key(mapped)
+            docs.append(mapped)
+            if len(docs) >= size:
+                break
+        return docs
+
+
+def _check_utf8(raw):
+    # A full decode pass before any write, so a bad byte late in the file
+    # rejects the upload without touching the bank.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in iter(lambda: raw.read(CSV_VALIDATE_CHUNK_SIZE), b""):
+        decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+    raw.seek(0)
+
+
 @router.post("/upload")
 async def upload_questions_csv(
     file: UploadFile = File(...),
-    current_user=Depends(get_current_user),
+    current_user=Depends(require_staff),
     db = Depends(get_database),
 ):
-    if current_user["role"] not in {"instructor", "admin"}:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
 
-    content = await file.read()
+    await file.seek(0)
     try:
-        decoded = content.decode("utf-8-sig")
-    except Exception:
+        await asyncio.to_thread(_check_utf8, file.file)
+    except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail="Unable to decode CSV (expected UTF-8)")
 
-    sniffer = csv.Sniffer()
-    sample = decoded[:4096]
-    delimiter = ","
-    try:
-        dialect = sniffer.sniff(sample, delimiters=[",", ";", "\t"])
-        delimiter = dialect.delimiter
-    except Exception:
-        delimiter = ","
-
-    raw_reader = csv.reader(io.StringIO(decoded), delimiter=delimiter)
-    try:
-        headers = next(raw_reader)
-    except StopIteration:
-        raise HTTPException(status_code=400, detail="CSV is empty.")
-
-    headers = [h.strip() for h in headers]
-    fieldnames = set(headers)
-    required_any = {"exam_type", "exam_typ"}
-    required_common = {"topic", "difficulty", "question", "answer"}
-    required_choices = {"a", "b", "c", "d"}
-    required_choices_alt = {"choice_a", "choice_b", "choice_c", "choice_d"}
-    required_subject = {"subject", "major_sub"}
-
-    if not (fieldnames & required_any):
-        raise HTTPException(status_code=400, detail="CSV must include exam_type or exam_typ.")
-    if not (fieldnames & required_subject):
-        raise HTTPException(status_code=400, detail="CSV must include subject or major_sub.")
-    if not required_common.issubset(fieldnames):
-        raise HTTPException(
-            status_code=400,
-            detail="CSV must include topic, difficulty, question, and answer.",
-        )
-    if not (required_choices.issubset(fieldnames) or required_choices_alt.issubset(fieldnames)):
-        raise HTTPException(
-            status_code=400,
-            detail="CSV must include either a,b,c,d or choice_a,choice_b,choice_c,choice_d.",
-        )
-
+    # Decode and parse the spooled upload incrementally, one batch at a time,
+    # in a worker thread so the event loop stays free.
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
     added = 0
-    skipped = 0
-    question_idx = headers.index("question") if "question" in headers else None
-    errors = []
-
-    def _skip(reason: str):
-        nonlocal skipped
-        skipped += 1
-        errors.append({"row": raw_reader.line_num, "reason": reason})
-
-    for row in raw_reader:
-        if not row or all(not str(cell).strip() for cell in row):
-            continue
-        row_num = raw_reader.line_num
-        if question_idx is not None and len(row) > len(headers):
-            extra = len(row) - len(headers)
-            merged_question = ",".join(row[question_idx : question_idx + extra + 1])
-            row = (
-                row[:question_idx]
-                + [merged_question]
-                + row[question_idx + extra + 1 :]
+    try:
+        parser = await asyncio.to_thread(QuestionCsvParser, stream)
+        docs = await asyncio.to_thread(parser.next_batch, CSV_UPSERT_BATCH_SIZE)
+        while docs:
+            # Parse the next batch while Mongo applies this one.
+            flushed, docs = await asyncio.gather(
+                _flush_upserts(
+                    db,
+                    [UpdateOne({"question_key": doc["question_key"]}, {"$set": doc}, upsert=True) for doc in docs],
+                ),
+                asyncio.to_thread(parser.next_batch, CSV_UPSERT_BATCH_SIZE),
             )
-        if len(row) < len(headers):
-            row = row + [""] * (len(headers) - len(row))
-
-        row_dict = dict(zip(headers, row))
-        mapped = map_csv_row(row_dict)
-        if is_invalid_question(mapped):
-            missing = [
-                f
-                for f in ["exam_type", "subject", "topic", "difficulty", "question", "a", "b", "c", "d", "answer"]
-                if not (mapped.get(f) or "").strip()
-            ]
-            if missing:
-                _skip(f"Row {row_num}: missing field(s) — {', '.join(missing)}")
-            elif mapped.get("difficulty") not in {"Easy", "Medium", "Hard"}:
-                _skip(f"Row {row_num}: invalid difficulty '{mapped.get('difficulty')}' (use Easy, Medium, Hard)")
-            elif mapped.get("answer") not in {"A", "B", "C", "D"}:
-                _skip(f"Row {row_num}: invalid answer '{mapped.get('answer')}' (use A, B, C, or D)")
-            elif has_embedded_options(mapped.get("question", "")):
-                _skip(f"Row {row_num}: question text contains embedded options (A/B/C/D)")
-            else:
-                _skip(f"Row {row_num}: invalid or incomplete data")
-            continue
-        mapped["question_key"] = build_question_key(mapped)
-        result = await db.questions.update_one(
-            {"question_key": mapped["question_key"]},
-            {"$set": mapped},
-            upsert=True,
-        )
-        if result.upserted_id or result.modified_count:
-            added += 1
-
-    return {"added": added, "skipped": skipped, "errors": errors[:20]}
+            added += flushed
+    finally:
+        # Leave the underlying upload file for Starlette to close.
+        stream.detach()
+
+    return {"added": added, "skipped": parser.skipped, "errors": parser.errors}
@@ -3,7 +3,8 @@ import hashlib
 from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
-from .auth import get_current_user
+from .auth import get_current_user, require_admin
+from .admin import get_or_create_settings
 from .database import get_database
 
 router = APIRouter(prefix="/recommend", tags=["Recommendations"])
@@ -138,7 +139,7 @@ async def get_next_action(current_user=Depends(get_current_user), db=Depends(get
     if not profile:
         raise HTTPException(status_code=400, detail="Profile not found")
 
-    settings = await db.app_settings.find_one({}) or {}
+    settings = await get_or_create_settings(db)
     rl_enabled = bool(settings.get("rl_enabled", False))
     passing_threshold = int(
         profile.get("required_passing_threshold")
@@ -230,10 +231,7 @@ async def post_feedback(
 
 
 @router.get("/admin/metrics")
-async def get_admin_rl_metrics(current_user=Depends(get_current_user), db=Depends(get_database)):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-
+async def get_admin_rl_metrics(current_user=Depends(require_admin), db=Depends(get_database)):
     since = datetime.utcnow() - timedelta(days=30)
     events = await db.rl_events.find({"created_at": {"$gte": since}}).to_list(length=5000)
 
@@ -0,0 +1,35 @@
+import os
+import time
+
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "60"))
+RESULT_CACHE_MAX_ENTRIES = 4096
+
+# (user_id, exam_type) -> latest PASS/FAIL outcome, "" when there is none yet.
+_cache = {}
+
+
+def get_cached_latest_result(user_id: str, exam_type: str):
+    key = (user_id, exam_type)
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if time.monotonic() >= expires_at:
+        _cache.pop(key, None)
+        return None
+    return result
+
+
+def set_cached_latest_result(user_id: str, exam_type: str, result: str):
+    key = (user_id, exam_type)
+    if key not in _cache and len(_cache) >= RESULT_CACHE_MAX_ENTRIES:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = (time.monotonic() + RESULT_CACHE_TTL_SECONDS, result or "")
+
+
+def invalidate_result_cache(user_id: str = None):
+    if user_id is None:
+        _cache.clear()
+        return
+    for key in [key for key in _cache if key[0] == user_id]:
+        _cache.pop(key, None)
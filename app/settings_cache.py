@@ -0,0 +1,25 @@
+import os
+import time
+
+SETTINGS_CACHE_TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "60"))
+
+_cache = None
+_expires_at = 0.0
+
+
+def get_cached_settings():
+    if _cache is not None and time.monotonic() < _expires_at:
+        return _cache
+    return None
+
+
+def set_cached_settings(settings: dict):
+    global _cache, _expires_at
+    _cache = settings
+    _expires_at = time.monotonic() + SETTINGS_CACHE_TTL_SECONDS
+
+
+def invalidate_settings_cache():
+    global _cache, _expires_at
+    _cache = None
+    _expires_at = 0.0
@@ -0,0 +1,31 @@
+import os
+import time
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
+USER_CACHE_MAX_ENTRIES = 4096
+
+_cache = {}
+
+
+def get_cached_user(email: str):
+    entry = _cache.get(email)
+    if entry is None:
+        return None
+    expires_at, state = entry
+    if time.monotonic() >= expires_at:
+        _cache.pop(email, None)
+        return None
+    return state
+
+
+def set_cached_user(email: str, state: dict):
+    if email not in _cache and len(_cache) >= USER_CACHE_MAX_ENTRIES:
+        _cache.pop(next(iter(_cache)))
+    _cache[email] = (time.monotonic() + USER_CACHE_TTL_SECONDS, state)
+
+
+def invalidate_user_cache(email: str = None):
+    if email is None:
+        _cache.clear()
+    else:
+        _cache.pop(email, None)